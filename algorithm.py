@@ -21,30 +21,56 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
-from gurobipy import GRB, quicksum
+from gurobipy import GRB
 
-from compact_formulation import construct_compact_formulation
+from backends import get_backend
+from compact_formulation import (construct_compact_formulation, 
+                                 copy_compact_formulation)
 from extensions.num_weekends import cf_weekend_obj
 from extensions.num_employees import cf_employee_obj
 from extensions.rest_periods import cf_rest_period_ctr
 
-from reader import read_example
+from reader import prune_blocks, read_example
+from stint_table import StintTable
 from time import time
+from types import SimpleNamespace
+import threading
 from subproblem import subproblem
-from helper import subcyclecuts
+from subproblem_cache import SubproblemCache
+from helper import Deadline, subcyclecuts, track_progress, update_progress
+from instrumentation import Stats, timed_callback
+from symmetry import add_symmetry_breaking, subproblem_shifts, symmetry_shifts
+from multiple_solutions import (add_nogood, bound_objective, exclude_solution, 
+                                find_multiple_solutions)
 import collections
 
 
-def run_algorithm(run_data, time_limit=1000):
-    # num_sol counts the number of solutions found
-    num_sol = 0
+def prepare_instance(path, cache=None, data=None, prune_demand=False, 
+                     stats=None, env=None):
+    """
+    Read a problem instance and construct the base compact formulation, which
+    is shared by all problem variants of the instance. If a model cache is 
+    given, the base model is reloaded from the cache whenever possible. Data 
+    that has already been read (see reader.Example) is not read again.
+    With prune_demand, work blocks that cannot be placed given the demand are 
+    removed. The time for reading and building is recorded in stats. The base
+    model is constructed in the Gurobi environment env, if given. The stint 
+    table of the instance is shared by all its models (see stint_table.py).
+    """
+    if stats is None:
+        stats = Stats()
 
     # Read problem parameteres from problem instance file
-    (length_of_schedule, num_employees, S, demand, 
-        blocks, forbidden, min_off, max_off) = read_example(run_data.path)
-    
-    run_data.num_employees = num_employees
-    run_data.num_days = length_of_schedule
+    with stats.phase("read"):
+        (length_of_schedule, num_employees, S, demand, 
+            blocks, forbidden, min_off, max_off) = read_example(path, data)
+
+    num_pruned_blocks = 0
+    if prune_demand:
+        with stats.phase("prune"):
+            blocks, num_pruned_blocks = prune_blocks(blocks, demand, 
+                                                     length_of_schedule)
+
     B = {i: [(idx, s) for idx, s in enumerate(b)] 
          for i, b in enumerate(blocks)}
     # Allowable day off sequences
@@ -54,48 +80,257 @@ def run_algorithm(run_data, time_limit=1000):
         f_dict[f].append(l)
     forbidden = f_dict
 
-    cf_model = construct_compact_formulation(num_employees, run_data.num_days, 
-                                             S, min_off, max_off, demand, 
-                                             B, H, forbidden)
-    
-    cf_model.setParam("TimeLimit", 1000)
-    cf_model._B = B
-    cf_model._H = H
-    cf_model._run_data = run_data
-    x = cf_model._x
+    cf_model = None
+    with stats.phase("build"):
+        stints = StintTable(length_of_schedule, B, H)
+        if cache is not None:
+            key = cache.key(num_employees, length_of_schedule, S, demand, 
+                            blocks, sorted(forbidden.items()), min_off, 
+                            max_off)
+            cf_model = cache.load(key)
+            stats.count("model_cache_hits", cf_model is not None)
+        if cf_model is None:
+            cf_model = construct_compact_formulation(num_employees, 
+                                                     length_of_schedule, S, 
+                                                     min_off, max_off, demand, 
+                                                     B, H, forbidden, env,
+                                                     stints)
+            if cache is not None:
+                cache.store(key, cf_model)
+    stats.record_model("base", cf_model)
+
+    return SimpleNamespace(path=path, num_days=length_of_schedule, 
+                           num_employees=num_employees, num_shifts=S, 
+                           demand=demand, blocks=blocks, B=B, H=H, 
+                           forbidden=forbidden, min_off=min_off, 
+                           max_off=max_off, num_pruned_blocks=num_pruned_blocks,
+                           stints=stints, cf_model=cf_model, 
+                           lock=threading.Lock(), 
+                           sp_cache=SubproblemCache(length_of_schedule))
+
+
+def solve_subproblem(cf_sol, instance, run_data, threads=0, backend=None, 
+                     env=None, deadline=None):
+    """
+    Solve the subproblem for a compact formulation solution. Subproblem 
+    outcomes are reused across iterations and variants of the instance, 
+    unless the deadline was reached (status 3).
+    """
+    with run_data.stats.phase("subproblem"):
+        sp_result = instance.sp_cache.get(cf_sol, run_data.REST_PERIODS)
+        if sp_result is None:
+            run_data.sp_cache_misses += 1
+            sp_result = subproblem(cf_sol, instance.B, instance.H, 
+                                   instance.forbidden, instance.num_days, 
+                                   run_data.REST_PERIODS, threads=threads, 
+                                   env=env, stats=run_data.stats, 
+                                   backend=backend, deadline=deadline, 
+                                   stints=instance.stints)
+            if sp_result[0] != 3:
+                instance.sp_cache.put(cf_sol, run_data.REST_PERIODS, 
+                                      sp_result)
+        else:
+            run_data.sp_cache_hits += 1
+    return sp_result
+
+
+def run_algorithm(run_data, time_limit=1000, threads=0, instance=None, 
+                  cache=None, lazy_subproblem=False, solution_pool=True, 
+                  sp_workers=4, prune_demand=False, profile=False, 
+                  backend="gurobi", env=None, deadline=None, progress=None, 
+                  symmetry=False, params=None):
+    """
+    Solve a problem variant of an instance. With lazy_subproblem, the 
+    subproblem is solved within the callback of the compact formulation and
+    infeasible solutions are cut off by lazy constraints (12), such that a 
+    single branch-and-cut run suffices for finding a schedule. Subproblems are
+    only solved for solutions that improve on the incumbent. The lazy mode 
+    pays off if many compact formulation solutions have infeasible 
+    subproblems, e.g., with rest periods, as the iterative mode restarts the
+    solve for each of them. Otherwise, the iterative mode is preferable, as it
+    only solves the subproblems of optimal solutions, whereas the lazy mode 
+    solves one for each improving solution within the callback. With 
+    solution_pool, multiple solutions are collected from Gurobi's solution 
+    pool and their subproblems are checked by sp_workers threads. Timings, 
+    counters and model sizes are recorded in run_data.stats, which is created 
+    unless the caller provides it. With profile, the phases are profiled (see 
+    instrumentation.Stats). The formulations are solved by the given solver 
+    backend (see backends.py), e.g., "gurobi" or "cpsat". If env is given, 
+    the models of the variant are created in this Gurobi environment, such 
+    that threads sharing an instance each use their own environment, and the 
+    subproblems of the solution pool are checked sequentially in env. Gurobi 
+    parameters of the compact formulation, e.g., {"MIPFocus": 1}, are set by
+    params.
+
+    All solves share a single deadline, which ends time_limit seconds after 
+    the call unless a helper.Deadline is given. The progress callback is 
+    called with a dictionary of the iteration, the elapsed time, the objective
+    value of the last compact formulation solution and the best bound on the 
+    objective, for each new compact formulation solution and solve. If the 
+    deadline is reached, run_data.time is "time limit" and run_data keeps the
+    best bound (bound), the objective value (cf_objective) and the stints 
+    (cf_solution) of the last compact formulation solution.
+
+    With symmetry, the rotation symmetry of the schedule is exploited (see 
+    symmetry.py): no-goods (12) also cut off the rotations of a solution with
+    an infeasible subproblem, and if only a single solution is sought, the 
+    rotations of the compact formulation that preserve the demand are broken.
+    """
+    if getattr(run_data, "stats", None) is None:
+        run_data.stats = Stats(profile)
+    if deadline is None:
+        deadline = Deadline(time_limit)
+
+    # Build the base model, unless it is provided for the instance
+    if instance is None:
+        instance = prepare_instance(run_data.path, cache, 
+                                    prune_demand=prune_demand, 
+                                    stats=run_data.stats)
+
+    run_data.num_employees = instance.num_employees
+    run_data.num_days = instance.num_days
+    run_data.num_pruned_blocks = instance.num_pruned_blocks
+
+    cf_model = build_variant(run_data, instance, env, symmetry)
+    return solve_variant(cf_model, run_data, instance, time_limit, threads, 
+                         lazy_subproblem, solution_pool, sp_workers, backend, 
+                         env, deadline, progress, params)
+
+
+def build_variant(run_data, instance, env=None, symmetry=False):
+    """
+    Layer the extensions of the problem variant of run_data onto a copy of 
+    the base model of the instance (see run_algorithm).
+    """
+    stats = run_data.stats
+    demand = instance.demand
+
+    # Problem variants are layered onto a copy of the base model
+    with stats.phase("copy"), instance.lock:
+        cf_model = copy_compact_formulation(instance.cf_model, env)
+
+    cf_model._B = instance.B
+    cf_model._H = instance.H
+    # Constraints that only apply to a single search, see multiple_solutions
+    cf_model._temporary = []
+    # Big-M constraints of _temporary by their binary and enforcing value
+    cf_model._indicators = {}
+    cf_model._symmetry_breaking = None
+    # Constraints (12) and the supports of the lazy constraints (12), which 
+    # are discarded after each solve
+    cf_model._nogoods = []
+    cf_model._lazy_nogoods = []
 
     # Consider extensions
-    if run_data.WEEKEND_OBJ:
-        cf_weekend_obj(cf_model, run_data.num_days, blocks, min_off, max_off)
+    with stats.phase("extensions"):
+        if run_data.WEEKEND_OBJ:
+            cf_weekend_obj(cf_model, instance.stints)
+
+        if run_data.EMPLOYEE_OBJ:
+            cf_employee_obj(cf_model, demand, 
+                            instance.num_days, run_data.REST_PERIODS)
 
-    if run_data.EMPLOYEE_OBJ:
-        cf_employee_obj(cf_model, demand, 
-                        run_data.num_days, run_data.REST_PERIODS)
+        if run_data.REST_PERIODS:
+            cf_rest_period_ctr(cf_model, instance.stints, instance.forbidden)
 
-    if run_data.REST_PERIODS:
-        cf_rest_period_ctr(cf_model, run_data.num_days, B, H, forbidden)
+        cf_model._nogood_shifts = [0]
+        if symmetry:
+            cf_model._nogood_shifts = subproblem_shifts(instance.num_days, 
+                                                        run_data.REST_PERIODS)
+            if run_data.COUNT_SOL <= 1:
+                cf_model._symmetry_breaking = add_symmetry_breaking(
+                    cf_model, 
+                    symmetry_shifts(demand, instance.num_days, run_data))
+    stats.record_model("compact", cf_model)
+    return cf_model
+
+
+def solve_variant(cf_model, run_data, instance, time_limit=1000, threads=0, 
+                  lazy_subproblem=False, solution_pool=True, sp_workers=4, 
+                  backend="gurobi", env=None, deadline=None, progress=None, 
+                  params=None):
+    """
+    Solve the compact formulation of a problem variant built by build_variant
+    and its subproblems until a schedule is found (see run_algorithm). 
+    Constraints (12) that are added to cf_model remain valid for further 
+    solves.
+    """
+    # num_sol counts the number of solutions found
+    num_sol = 0
+
+    stats = run_data.stats
+    backend = get_backend(backend)
+    if deadline is None:
+        deadline = Deadline(time_limit)
+    run_data.bound = None
+    run_data.cf_objective = None
+    run_data.cf_solution = None
+    run_data.sp_cache_hits = 0
+    run_data.sp_cache_misses = 0
+
+    if threads:
+        cf_model.setParam("Threads", threads)
+    for name, value in (params or {}).items():
+        cf_model.setParam(name, value)
+    cf_model._run_data = run_data
+    cf_model._lazy_subproblem = lazy_subproblem
+    cf_model._deadline = deadline
+    cf_model._progress = progress
+    cf_model._solve_subproblem = lambda cf_sol: solve_subproblem(
+        cf_sol, instance, run_data, threads, backend, env, deadline)
+    x = cf_model._x
+    callback = timed_callback(track_progress(subcyclecuts))
+
+    if solution_pool and backend.solution_pool and run_data.COUNT_SOL > 1:
+        return find_multiple_solutions(cf_model, instance, run_data, 
+                                       callback, time_limit, threads, 
+                                       sp_workers, deadline, 
+                                       [env] if env is not None else None)
 
     terminate = False
     start_time = time()
     while not terminate:
-        cf_model.optimize(subcyclecuts)
+        stats.count("iterations")
+        # All iterations share the deadline of the run
+        cf_model.setParam("TimeLimit", deadline.remaining())
+        with stats.phase("compact_solve"):
+            backend.optimize(cf_model, callback)
+        stats.count("nodes", backend.node_count(cf_model))
+        cf_status = backend.status(cf_model)
+        update_progress(run_data, deadline, progress, 
+                        backend.obj_val(cf_model) 
+                        if cf_status == GRB.OPTIMAL else None, 
+                        backend.obj_bound(cf_model))
+
+        # Deadline reached within the compact formulation
+        if cf_status in (GRB.TIME_LIMIT, GRB.INTERRUPTED):
+            run_data.time = "time limit"
+            return run_data
 
         # Compact formulation is infeasible
-        if cf_model.status != 2:
+        if cf_status != GRB.OPTIMAL:
             run_data.time = time() - start_time
             return run_data
 
+        x_vars = list(x.values())
+        x_vals = backend.values(cf_model, x_vars)
         cf_sol = []
-        for g, b, h in x:
-            if x[g, b, h].X:
-                for _ in range(int(round(x[g, b, h].X))):
+        for (g, b, h), val in zip(x.keys(), x_vals):
+            if val:
+                for _ in range(int(round(val))):
                     cf_sol.append((g, b, h))
+        run_data.cf_solution = cf_sol
 
-        sp_result = subproblem(cf_sol, B, H, forbidden, 
-                               run_data.num_days, run_data.REST_PERIODS)
+        # With lazy_subproblem, the result was already cached by the callback
+        sp_result = solve_subproblem(cf_sol, instance, run_data, threads, 
+                                     backend, env, deadline)
 
         status, result = sp_result
         terminate = False
+        # Deadline reached within the subproblem
+        if status == 3:
+            run_data.time = "time limit"
+            return run_data
         # Feasible solution found
         if status == 1:
             num_sol += 1
@@ -106,34 +341,14 @@ def run_algorithm(run_data, time_limit=1000):
                 run_data.time = time() - start_time
                 return run_data
             else:
-                if run_data.EMPLOYEE_OBJ:
-                    cf_model.addConstr(
-                        quicksum(cf_model._num_cycles[g, b, h]*x[g, b, h] 
-                                 for g, b, h in x) >= cf_model.objVal
-                        )
-                if run_data.WEEKEND_OBJ:
-                    cf_model.addConstr(
-                        quicksum(cf_model._free_we[g, b, h]*x[g, b, h] 
-                                 for g, b, h in x) <= cf_model.objVal
-                        )
-                M = 20
-                ms_helper = cf_model.addVar(vtype=GRB.BINARY)
-                # Constraints (15) and (16)
-                cf_model.addConstr(
-                    quicksum(x[k] for k in x if x[k].X > 0.5) 
-                    <= quicksum(x[k].X for k in x) - 1 + M*(1 - ms_helper)
-                    )
-                cf_model.addConstr(
-                    quicksum(x[k] for k in x if x[k].X > 0.5) 
-                    >= quicksum(x[k].X for k in x) + 1 - M*ms_helper
-                    )
+                bound_objective(cf_model, run_data, 
+                                backend.obj_val(cf_model))
+                exclude_solution(cf_model, x_vars, x_vals)
         # Subproblem infeasible
         elif status == 2:
-            # Constraints (12)
-            cf_model.addConstr(quicksum(x[k] for k in x if x[k].X > 0.1) 
-                               <= sum(x[k].X for k in x) - 1)
+            add_nogood(cf_model, x_vars, x_vals)
 
-        # Time limit reached
-        if (time() - start_time) >= time_limit:
+        # Deadline reached
+        if deadline.expired():
             run_data.time = "time limit"
             return run_data
@@ -0,0 +1,365 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import math
+from time import time
+from types import SimpleNamespace
+
+from gurobipy import GRB, GurobiError, LinExpr
+
+from instrumentation import Stats
+from subproblem import solve_formulation
+
+try:
+    from ortools.sat.python import cp_model, cp_model_helper
+except ImportError:
+    cp_model = None
+
+
+class GurobiBackend:
+    """
+    Solve the formulations with Gurobi, adding lazy constraints in callbacks.
+    """
+    name = "gurobi"
+    solution_pool = True
+
+    def optimize(self, model, callback=None):
+        model.optimize(callback)
+
+    def status(self, model):
+        return model.Status
+
+    def obj_val(self, model):
+        return model.ObjVal
+
+    def obj_bound(self, model):
+        try:
+            return model.ObjBound
+        except (AttributeError, GurobiError):
+            return None
+
+    def values(self, model, vars):
+        return model.getAttr("X", vars)
+
+    def node_count(self, model):
+        return int(model.NodeCount)
+
+    def solve_circuit(self, Nodes, arcs, threads=0, env=None, stats=None, 
+                      deadline=None):
+        return solve_formulation(Nodes, arcs, threads, env, stats, deadline)
+
+
+class CallbackModel:
+    """
+    Stand-in for a gurobipy model in a callback, such that callbacks like 
+    helper.subcyclecuts can be used by backends without callbacks. Lazy 
+    constraints are collected, all other attributes are those of the model.
+    """
+    def __init__(self, model, values, obj_val, obj_bound):
+        self._cb_model = model
+        self._cb_values = values
+        self._cb_obj_val = obj_val
+        self._cb_obj_bound = obj_bound
+        self._cb_lazy = []
+
+    def __getattr__(self, name):
+        return getattr(self._cb_model, name)
+
+    def cbGetSolution(self, vars):
+        values = self._cb_values
+        if hasattr(vars, "items"):
+            return {key: values[var.index] for key, var in vars.items()}
+        if isinstance(vars, (list, tuple)):
+            return [values[var.index] for var in vars]
+        return values[vars.index]
+
+    def cbGet(self, what):
+        if what in (GRB.Callback.MIPSOL_OBJBND, GRB.Callback.MIPNODE_OBJBND):
+            return self._cb_obj_bound
+        if what == GRB.Callback.MIPSOL_OBJ:
+            return self._cb_obj_val
+        if what == GRB.Callback.MIPSOL_OBJBST:
+            # Each solution is passed to the callback before it is accepted
+            return GRB.INFINITY * self._cb_model.ModelSense
+        raise GurobiError(10011, "Callback query {} is not available"
+                          .format(what))
+
+    def cbLazy(self, constr):
+        self._cb_lazy.append(constr)
+
+
+class CPSATBackend:
+    """
+    Solve the formulations with OR-Tools CP-SAT using num_workers parallel 
+    workers (0 for all cores), unless the model's Threads parameter is set. 
+    Models are constructed with gurobipy and translated to CP-SAT, which 
+    requires integral coefficients. Continuous variables are treated as 
+    integers, which holds for the formulations of the RWSP, and unbounded 
+    variables are bounded by max_domain. As CP-SAT has no callbacks, the 
+    callback is called for each optimal solution and the model is solved 
+    again until no lazy constraints are added.
+
+    The CP-SAT model is kept with the gurobipy model, such that lazy 
+    constraints and the constraints added between solves, e.g., no-goods (12)
+    and exclusions (15)/(16), extend it, and each solve is hinted with the 
+    previous solution. Big-M constraints listed in the model's _indicators 
+    are translated into constraints enforced by their binary variable.
+    """
+    name = "cpsat"
+    solution_pool = False
+
+    def __init__(self, num_workers=0, max_domain=10**6):
+        if cp_model is None:
+            raise ImportError("The CP-SAT backend requires OR-Tools")
+        self.num_workers = num_workers
+        self.max_domain = max_domain
+
+    def _domain(self, lb, ub):
+        lb = max(-self.max_domain, min(self.max_domain, lb))
+        ub = max(-self.max_domain, min(self.max_domain, ub))
+        return math.ceil(lb - 1e-9), math.floor(ub + 1e-9)
+
+    def _expr(self, cp_vars, expr):
+        coeffs = [expr.getCoeff(k) for k in range(expr.size())]
+        if any(coeff != round(coeff) for coeff in coeffs):
+            raise ValueError("CP-SAT requires integral coefficients")
+        return cp_model.LinearExpr.WeightedSum(
+            [cp_vars[expr.getVar(k).index] for k in range(expr.size())], 
+            [int(round(coeff)) for coeff in coeffs])
+
+    def _add_constr(self, model, cp, cp_vars, constr, sense, rhs):
+        """
+        Translate a constraint and return the CP-SAT constraint.
+        """
+        row = model.getRow(constr)
+        indicator = getattr(model, "_indicators", {}).get(constr)
+        literal = None
+        if indicator is not None:
+            # The big-M term of the binary is replaced by the enforcement of
+            # the constraint for binary == value
+            binary, value = indicator
+            terms = [(row.getVar(k), row.getCoeff(k)) 
+                     for k in range(row.size())]
+            rest = [(var, coeff) for var, coeff in terms 
+                    if not var.sameAs(binary)]
+            row = LinExpr([coeff for _, coeff in rest], 
+                          [var for var, _ in rest])
+            rhs -= sum(coeff for var, coeff in terms 
+                       if var.sameAs(binary)) * value
+            literal = cp_vars[binary.index]
+            if not value:
+                literal = literal.Not()
+        expr = self._expr(cp_vars, row)
+        if sense == GRB.LESS_EQUAL:
+            ct = cp.Add(expr <= math.floor(rhs + 1e-9))
+        elif sense == GRB.GREATER_EQUAL:
+            ct = cp.Add(expr >= math.ceil(rhs - 1e-9))
+        elif rhs != round(rhs):
+            ct = cp.AddBoolOr([])
+        else:
+            ct = cp.Add(expr == int(round(rhs)))
+        if literal is not None:
+            ct.OnlyEnforceIf(literal)
+        return ct
+
+    def translate(self, model):
+        """
+        Translate a gurobipy model to a CP-SAT model, or bring the CP-SAT 
+        model of a previous call up to date. New variables and constraints 
+        are added and changed bounds are updated. Constraints that were 
+        removed or whose sense or right-hand side changed are cleared, as 
+        CP-SAT cannot remove constraints; changed coefficients of existing 
+        constraints are not detected.
+        """
+        model.update()
+        if model.NumQConstrs or model.NumGenConstrs or model.NumSOS:
+            raise ValueError("CP-SAT backend supports linear models only")
+        state = getattr(model, "_cpsat_model", None)
+        if state is None:
+            state = SimpleNamespace(cp=cp_model.CpModel(), vars={}, 
+                                    constrs={}, hint={})
+            model._cpsat_model = state
+        cp = state.cp
+
+        vars = model.getVars()
+        cp_vars = []
+        for var, lb, ub in zip(vars, model.getAttr("LB", vars), 
+                               model.getAttr("UB", vars)):
+            domain = self._domain(lb, ub)
+            # Variables are kept by identity, as their indices change when
+            # variables are removed
+            entry = state.vars.get(id(var))
+            if entry is None:
+                entry = (var, cp.NewIntVar(*domain, ""), domain)
+            elif entry[2] != domain:
+                proto = cp.Proto().variables[entry[1].Index()].domain
+                proto.clear()
+                proto.extend(domain)
+                entry = (var, entry[1], domain)
+            state.vars[id(var)] = entry
+            cp_vars.append(entry[1])
+
+        constrs = model.getConstrs()
+        current = set()
+        for constr, sense, rhs in zip(constrs, 
+                                      model.getAttr("Sense", constrs), 
+                                      model.getAttr("RHS", constrs)):
+            current.add(constr)
+            entry = state.constrs.get(constr)
+            if entry is not None and entry[0] == (sense, rhs):
+                continue
+            if entry is not None:
+                self._clear(cp, entry[1])
+            state.constrs[constr] = ((sense, rhs), self._add_constr(
+                model, cp, cp_vars, constr, sense, rhs))
+        for constr in [c for c in state.constrs if c not in current]:
+            self._clear(cp, state.constrs.pop(constr)[1])
+
+        cp.ClearObjective()
+        obj = model.getObjective()
+        if obj.size():
+            if model.ModelSense == GRB.MINIMIZE:
+                cp.Minimize(self._expr(cp_vars, obj))
+            else:
+                cp.Maximize(self._expr(cp_vars, obj))
+        return cp, cp_vars
+
+    def _clear(self, cp, ct):
+        """
+        Clear a constraint of the CP-SAT model.
+        """
+        cp.Proto().constraints[ct.Index()].copy_from(
+            cp_model_helper.ConstraintProto())
+
+    def optimize(self, model, callback=None):
+        start_time = time()
+        time_limit = model.Params.TimeLimit
+        cp, cp_vars = self.translate(model)
+        state = model._cpsat_model
+        obj = model.getObjective()
+        result = SimpleNamespace(status=GRB.LOADED, obj_val=None, 
+                                 obj_bound=None, values=None, node_count=0)
+        model._cpsat_result = result
+        while True:
+            # Hint the previous solution, which remains feasible for the
+            # variables and constraints it covers unless it was cut off
+            cp.ClearHints()
+            for var, cp_var in zip(model.getVars(), cp_vars):
+                if id(var) in state.hint:
+                    cp.AddHint(cp_var, state.hint[id(var)])
+            solver = cp_model.CpSolver()
+            solver.parameters.num_workers = (model.Params.Threads 
+                                             or self.num_workers)
+            if time_limit < GRB.INFINITY:
+                solver.parameters.max_time_in_seconds = max(
+                    0, time_limit - (time() - start_time))
+            status = solver.Solve(cp)
+            result.node_count += solver.NumBranches()
+            if obj.size() and status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                result.obj_bound = (solver.BestObjectiveBound() 
+                                    + obj.getConstant())
+
+            if status == cp_model.MODEL_INVALID:
+                raise ValueError(cp.Validate())
+            if status == cp_model.INFEASIBLE:
+                result.status = GRB.INFEASIBLE
+                return
+            if status != cp_model.OPTIMAL:
+                result.status = GRB.TIME_LIMIT
+                return
+
+            result.values = [solver.Value(var) for var in cp_vars]
+            state.hint = {id(var): value for var, value 
+                          in zip(model.getVars(), result.values)}
+            result.obj_val = solver.ObjectiveValue() + obj.getConstant()
+            if callback is None:
+                break
+            cb_model = CallbackModel(model, result.values, result.obj_val, 
+                                     result.obj_val)
+            callback(cb_model, GRB.Callback.MIPSOL)
+            if not cb_model._cb_lazy:
+                break
+            # Lazy constraints are added to both models
+            for constr in cb_model._cb_lazy:
+                model.addConstr(constr)
+            cp, cp_vars = self.translate(model)
+        result.status = GRB.OPTIMAL
+
+    def status(self, model):
+        return model._cpsat_result.status
+
+    def obj_val(self, model):
+        return model._cpsat_result.obj_val
+
+    def obj_bound(self, model):
+        return model._cpsat_result.obj_bound
+
+    def values(self, model, vars):
+        return [model._cpsat_result.values[var.index] for var in vars]
+
+    def node_count(self, model):
+        return model._cpsat_result.node_count
+
+    def solve_circuit(self, Nodes, arcs, threads=0, env=None, stats=None, 
+                      deadline=None):
+        """
+        Solve the subproblem as a circuit constraint. Returns the tour of 
+        stints, or None if the subproblem is infeasible. Raises TimeoutError 
+        if the deadline is reached.
+        """
+        if stats is None:
+            stats = Stats()
+        cp = cp_model.CpModel()
+        lits = {(i, j): cp.NewBoolVar("") for i, j in arcs}
+        cp.AddCircuit([(i, j, lit) for (i, j), lit in lits.items()])
+        solver = cp_model.CpSolver()
+        solver.parameters.num_workers = threads or self.num_workers
+        if deadline is not None:
+            solver.parameters.max_time_in_seconds = deadline.remaining()
+        with stats.phase("sp_solve"):
+            status = solver.Solve(cp)
+        if status == cp_model.UNKNOWN:
+            raise TimeoutError("Deadline reached in the subproblem")
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return None
+        succ = {i: j for (i, j), lit in lits.items() if solver.Value(lit)}
+
+        # Follow the successors to obtain the tour
+        tour = [0]
+        while len(tour) < len(Nodes):
+            tour.append(succ[tour[-1]])
+        return tour
+
+
+backends = {"gurobi": GurobiBackend, "cpsat": CPSATBackend}
+
+
+def get_backend(backend="gurobi"):
+    """
+    Return a solver backend given by its name, or the backend itself.
+    """
+    if isinstance(backend, str):
+        if backend not in backends:
+            raise ValueError("Unknown solver backend {}".format(backend))
+        return backends[backend]()
+    return backend
@@ -0,0 +1,114 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from types import SimpleNamespace
+from time import time
+
+from algorithm import prepare_instance, run_algorithm
+from instrumentation import Stats, run_record
+from model_cache import ModelCache
+
+# Base model of the most recent instance solved by this worker process, with
+# the options it was prepared with and the stats of reading and building it
+_instance = SimpleNamespace(key=None)
+
+
+def init_run_data(path, EMPLOYEE_OBJ, REST_PERIODS, WEEKEND_OBJ, COUNT_SOL):
+    """
+    Initialize run_data for a single (instance, variant) task.
+    """
+    return SimpleNamespace(path=path, num_days=-1, num_sol=0,
+                           time=0, schedule="", num_employees=-1,
+                           EMPLOYEE_OBJ=EMPLOYEE_OBJ, REST_PERIODS=REST_PERIODS,
+                           WEEKEND_OBJ=WEEKEND_OBJ, COUNT_SOL=COUNT_SOL)
+
+
+def error_record(task, error):
+    """
+    Return the result record of a task that failed with error.
+    """
+    record = run_record(init_run_data(*task))
+    record["time"] = "error"
+    record["error"] = str(error)
+    return record
+
+
+def solve_task(task, time_limit=1000, threads=0, cache_dir=None, 
+               prune_demand=False, profile=False, **options):
+    """
+    Solve a single (instance, variant) task and return its result record, 
+    which is JSON-serializable. Further options are passed on to 
+    run_algorithm. The stats of reading and building the base model are 
+    included in the record, also if the base model of a previous task is 
+    reused.
+    """
+    global _instance
+    run_data = init_run_data(*task)
+    run_data.stats = Stats(profile)
+    start_time = time()
+    # Tasks are submitted per instance, such that consecutive tasks of a 
+    # worker mostly reuse the same base model
+    key = (run_data.path, prune_demand, cache_dir)
+    if _instance.key != key:
+        cache = ModelCache(cache_dir) if cache_dir is not None else None
+        stats = Stats(profile)
+        _instance = prepare_instance(run_data.path, cache, 
+                                     prune_demand=prune_demand, stats=stats)
+        _instance.key = key
+        _instance.stats = stats
+    run_data.stats.add(_instance.stats)
+    run_algorithm(run_data, time_limit=time_limit, threads=threads, 
+                  instance=_instance, **options)
+    record = run_record(run_data)
+    record["wall_time"] = time() - start_time
+    return record
+
+
+def run_batch(tasks, num_workers=None, threads=None, time_limit=1000, 
+              cache_dir=None, prune_demand=False, **options):
+    """
+    Solve optimization tasks on a process pool and yield the result records 
+    in the order in which the tasks finish. Each worker receives a budget of
+    Gurobi threads such that the pool does not oversubscribe the machine. If
+    cache_dir is given, base models are shared through an on-disk cache. A 
+    failed task yields an error record (see error_record), such that the 
+    remaining tasks are still solved.
+    """
+    num_cpus = os.cpu_count() or 1
+    if num_workers is None:
+        num_workers = num_cpus
+    if threads is None:
+        threads = max(1, num_cpus // num_workers)
+
+    with ProcessPoolExecutor(max_workers=num_workers) as pool:
+        futures = {pool.submit(solve_task, task, time_limit, threads, 
+                               cache_dir, prune_demand, **options): task 
+                   for task in tasks}
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception as e:
+                record = error_record(futures[future], e)
+            yield record
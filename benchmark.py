@@ -0,0 +1,208 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import argparse
+import json
+import os
+import sys
+
+from algorithm import prepare_instance, run_algorithm
+from batch import init_run_data
+from experiments import variant_name
+from instance_generator import write_instances
+from instrumentation import Stats
+from run import problem_variants
+
+# Phases attributed to building the model of a problem variant
+build_phases = ("read", "prune", "build", "copy", "extensions")
+
+
+def benchmark_task(path, variant, time_limit=60, threads=0, 
+                   trace_memory=False, **options):
+    """
+    Build and solve a problem variant from scratch and return a benchmark 
+    record with build and solve time, iterations and, with trace_memory, the 
+    peak memory per phase. A failed task yields the status error and the 
+    error message.
+    """
+    run_data = init_run_data(path, *variant)
+    run_data.stats = stats = Stats(trace_memory=trace_memory)
+    error = None
+    try:
+        instance = prepare_instance(path, stats=stats)
+        run_algorithm(run_data, time_limit=time_limit, threads=threads, 
+                      instance=instance, **options)
+    except Exception as e:
+        error = str(e)
+
+    if error is not None:
+        status = "error"
+    elif run_data.schedule:
+        status = "feasible"
+    elif run_data.time == "time limit":
+        status = "time limit"
+    else:
+        status = "infeasible"
+    num_employees = (len(run_data.schedule) // run_data.num_days 
+                     if run_data.schedule else None)
+
+    return {
+        "instance": os.path.basename(path), "variant": variant_name(variant),
+        "status": status, "error": error, "num_employees": num_employees,
+        "build_time": sum(stats.phases[p] for p in build_phases),
+        "solve_time": sum(stats.phases[p] for p in stats.phases 
+                          if p not in build_phases),
+        "iterations": stats.counters["iterations"],
+        "phases": dict(stats.phases),
+        "peak_memory": dict(stats.peak_memory)
+        }
+
+
+def run_benchmark(paths, variants=problem_variants, time_limit=60, threads=0, 
+                  repeat=1, trace_memory=True, **options):
+    """
+    Benchmark all problem variants of the instances sequentially. With 
+    repeat, each task is run several times and its fastest run is kept. As 
+    tracing memory slows down the run, the peak memory is measured in an 
+    additional run.
+    """
+    records = []
+    for path in paths:
+        for variant in variants:
+            runs = [benchmark_task(path, variant, time_limit, threads, 
+                                   **options) for _ in range(repeat)]
+            record = min(runs, key=lambda r: r["build_time"] 
+                         + r["solve_time"])
+            if trace_memory:
+                record["peak_memory"] = benchmark_task(
+                    path, variant, time_limit, threads, trace_memory=True, 
+                    **options)["peak_memory"]
+            records.append(record)
+    return records
+
+
+def record_key(record):
+    return "{}|{}".format(record["instance"], record["variant"])
+
+
+def compare(records, baseline, tolerance=0.25, min_time=0.05):
+    """
+    Compare benchmark records to a baseline and return a description of each
+    regression: changed outcomes, more employees, more iterations and build 
+    time, solve time or peak memory exceeding the baseline by more than the 
+    relative tolerance. Time differences below min_time seconds are ignored.
+    """
+    regressions = []
+    for record in records:
+        key = record_key(record)
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if record["status"] != base["status"]:
+            regressions.append("{}: status {} -> {}".format(
+                key, base["status"], record["status"]))
+            continue
+        if (record["num_employees"] or 0) > (base["num_employees"] or 0):
+            regressions.append("{}: employees {} -> {}".format(
+                key, base["num_employees"], record["num_employees"]))
+        if record["iterations"] > base["iterations"] * (1 + tolerance):
+            regressions.append("{}: iterations {} -> {}".format(
+                key, base["iterations"], record["iterations"]))
+        for name in ("build_time", "solve_time"):
+            if (record[name] > base[name] * (1 + tolerance) 
+                    and record[name] - base[name] > min_time):
+                regressions.append("{}: {} {:.3f}s -> {:.3f}s".format(
+                    key, name, base[name], record[name]))
+        for phase, peak in record["peak_memory"].items():
+            base_peak = base["peak_memory"].get(phase)
+            if base_peak and peak > base_peak * (1 + tolerance):
+                regressions.append("{}: peak memory of {} {} -> {}".format(
+                    key, phase, base_peak, peak))
+    return regressions
+
+
+def print_records(records):
+    print("{:<32} {:<10} {:<11} {:>5} {:>9} {:>9} {:>6} {:>9}".format(
+        "Instance", "Variant", "Status", "Empl", "Build[s]", "Solve[s]", 
+        "Iter", "Peak[MB]"))
+    for r in records:
+        peak = max(r["peak_memory"].values(), default=0) / 2**20
+        print("{:<32} {:<10} {:<11} {:>5} {:>9.3f} {:>9.3f} {:>6} {:>9.1f}"
+              .format(r["instance"], r["variant"], r["status"], 
+                      r["num_employees"] or "-", r["build_time"], 
+                      r["solve_time"], r["iterations"], peak))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the problem variants on RWSP instances.")
+    parser.add_argument("instances", nargs="*", 
+                        help="problem instance files (*.dzn)")
+    parser.add_argument("--generate", metavar="DIR", 
+                        help="generate instances into DIR")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 12, 16])
+    parser.add_argument("--shifts", type=int, nargs="+", default=[2, 3])
+    parser.add_argument("--densities", type=float, nargs="+", 
+                        default=[0.65, 0.75])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", 
+                        help="do not measure the peak memory")
+    parser.add_argument("--output", help="write the records as JSON")
+    parser.add_argument("--baseline", help="compare to a baseline (JSON)")
+    parser.add_argument("--update-baseline", action="store_true", 
+                        help="store the records as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    paths = list(args.instances)
+    if args.generate:
+        paths += write_instances(args.generate, args.sizes, args.shifts, 
+                                 args.densities, seed=args.seed)
+    if not paths:
+        parser.error("no problem instances given")
+
+    records = run_benchmark(paths, time_limit=args.time_limit, 
+                            threads=args.threads, repeat=args.repeat, 
+                            trace_memory=not args.no_memory)
+    print_records(records)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(records, f, indent=1)
+
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({record_key(r): r for r in records}, f, indent=1)
+    elif args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(records, json.load(f), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
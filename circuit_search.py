@@ -0,0 +1,106 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import collections
+
+
+def search_circuit(Nodes, arcs, budget=100000, deadline=None):
+    """
+    Search for a single cycle through all stints, i.e., an Eulerian circuit in
+    the multigraph of days with stints as edges in which every two consecutive
+    stints are connected by a feasible arc. Stints with the same (g,b,h) are 
+    interchangeable, such that failed states are memoized as the last stint 
+    type and the multiset of remaining stint types.
+
+    Returns the tour as a list of nodes, an empty list if no such cycle exists
+    or None if the search budget is exhausted or the deadline is reached.
+    """
+    if not Nodes:
+        return []
+
+    # Group interchangeable stints by type
+    nodes_by_type = collections.defaultdict(list)
+    for i, node in Nodes.items():
+        nodes_by_type[node.mp_id].append(i)
+    types = list(nodes_by_type)
+    type_of = {i: k for k, t in enumerate(types) for i in nodes_by_type[t]}
+
+    succ = [set() for _ in types]
+    for i, j in arcs:
+        succ[type_of[i]].add(type_of[j])
+
+    n = len(Nodes)
+    counts = [len(nodes_by_type[t]) for t in types]
+
+    def candidates(t):
+        # Prefer stint types with many remaining stints
+        return iter(sorted(succ[t], key=lambda u: -counts[u]))
+
+    # Every cycle contains a stint of the first type, so it may start there
+    first = 0
+    counts[first] -= 1
+    path = [first]
+    stack = [candidates(first)]
+    keys = [None]
+    failed = set()
+    expansions = 0
+
+    while stack:
+        expansions += 1
+        if expansions > budget:
+            return None
+        if deadline is not None and expansions % 1000 == 0 and \
+                deadline.expired():
+            return None
+
+        if len(path) == n:
+            if first in succ[path[-1]]:
+                tour = []
+                for t in path:
+                    tour.append(nodes_by_type[types[t]][counts[t]])
+                    counts[t] += 1
+                return tour
+        else:
+            advanced = False
+            for t in stack[-1]:
+                if counts[t] == 0:
+                    continue
+                counts[t] -= 1
+                key = (t, tuple(counts))
+                if key in failed:
+                    counts[t] += 1
+                    continue
+                path.append(t)
+                stack.append(candidates(t))
+                keys.append(key)
+                advanced = True
+                break
+            if advanced:
+                continue
+
+        # Backtrack
+        failed.add(keys.pop())
+        stack.pop()
+        counts[path.pop()] += 1
+
+    return []
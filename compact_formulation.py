@@ -21,66 +21,130 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
-from gurobipy import GRB, quicksum
-from helper import ShiftModel, construct_coverage_set, get_num_planning_cycles
+import collections
+from gurobipy import GRB, quicksum, tupledict
+from helper import CycleArray, ShiftModel, construct_coverage_set
+from stint_table import StintTable
+
+
+def presolve_stints(num_days, staff_req, B, H, forbidden):
+    """
+    Determine the upper bounds on the number of blocks starting on each day and
+    the stints (g,b,h) that are not fixed to zero. A stint is fixed to zero if
+    its block covers a day without demand for one of its shifts, or if no 
+    remaining stint may precede or follow it.
+    """
+    G = range(num_days)
 
+    # Simple upper bound for x_{gbh}
+    ub = {}
+    for g in G:
+        for b in B:
+            ub[g, b] = min(staff_req[s][(g+d) % num_days] for d, s in B[b])
+
+    stints = {(g, b, h) for g in G for b in B for h in H if ub[g, b] > 0}
+    changed = True
+    while changed:
+        first_shifts = collections.defaultdict(set)
+        next_start = set()
+        for g, b, h in stints:
+            first_shifts[g].add(B[b][0][1])
+            next_start.add((g + len(B[b]) + H[h]) % num_days)
+
+        remaining = set()
+        for g, b, h in stints:
+            successors = first_shifts[(g + len(B[b]) + H[h]) % num_days]
+            if H[h] == 1:
+                successors = successors.difference(
+                    forbidden.get(B[b][-1][1], ()))
+            if successors and g in next_start:
+                remaining.add((g, b, h))
+        changed = len(remaining) < len(stints)
+        stints = remaining
+
+    return sorted(stints), ub
+
+
+def arc_bounds(num_days, B, H, x_ub):
+    """
+    Upper bounds on v_{ij}, the sum of the upper bounds x_ub of the stints 
+    starting on day i whose next stint starts on day j.
+    """
+    bounds = collections.defaultdict(int)
+    for (g, b, h), ub in x_ub.items():
+        bounds[g, (g + len(B[b]) + H[h]) % num_days] += ub
+    return bounds
 
-def construct_compact_formulation(num_employees, num_days, num_shifts, 
-                                  min_off, max_off, staff_req, B, H, forbidden):
 
+def construct_compact_formulation(num_employees, num_days, num_shifts, 
+                                  min_off, max_off, staff_req, B, H, forbidden,
+                                  env=None, stints=None):
+    """
+    Construct the compact formulation in the Gurobi environment env, if given.
+    The attributes of the stints are taken from the stint table stints, 
+    which is computed unless it is given.
+    """
     G = range(num_days)
     S = range(num_shifts)
+    if stints is None:
+        stints = StintTable(num_days, B, H)
 
-    m = ShiftModel()
+    m = ShiftModel(env=env)
     m.setParam("OutputFlag", 0)
 
-    block_ending_day = {
-        (g, b): (g + len(B[b]) - 1) % num_days for g in G for b in B
-        }
+    # Only stints that are not fixed to zero are created
+    keys, ub = presolve_stints(num_days, staff_req, B, H, forbidden)
 
     # Decision Variables
-    x = m.addCyclicVars(num_days, len(B), len(H), vtype=GRB.INTEGER, name="x")
-    v = m.addVars(num_days, num_days, vtype=GRB.INTEGER, name="v")
+    x = m.addCyclicVars(num_days, len(B), len(H), keys=keys, 
+                        ub={(g, b, h): ub[g, b] for g, b, h in keys}, 
+                        vtype=GRB.INTEGER, name="x")
+    v_ub = arc_bounds(num_days, B, H, {(g, b, h): ub[g, b] 
+                                       for g, b, h in keys})
+    v = m.addVars(num_days, num_days, 
+                  ub={(i, j): v_ub[i, j] for i in G for j in G}, 
+                  vtype=GRB.INTEGER, name="v")
 
     C = construct_coverage_set(G, S, B)
 
-    # Simple upper bound for x_{gbh}
-    ub = {}
+    num_cycles = stints.lookup("num_cycles", x.keys())
+
+    # Inverse indexes: stints per (start day, start day of next stint) and 
+    # blocks per (ending day, last shift)
+    stints_by_arc = collections.defaultdict(list)
+    for (g, b, h), end in stints.lookup("end", x.keys()).items():
+        stints_by_arc[g, end].append(x[g, b, h])
+
+    blocks_by_end = collections.defaultdict(list)
     for g in G:
         for b in B:
-            max_block = 1e6
-            for d, s in B[b]:
-                curr_d = (g+d) % len(G)
-                if staff_req[s][curr_d] < max_block:
-                    max_block = staff_req[s][curr_d]
-            ub[g, b] = max_block
-
-    num_cycles = {
-        (g, b, h): get_num_planning_cycles(g, (g+len(B[b])-1) % num_days, H[h], 
-                                           num_days, len(B[b]))
-        for g, b, h in x
-                }
+            blocks_by_end[int(stints.last_day[g, b, 0]), 
+                          int(stints.last_shift[g, b, 0])].append((g, b))
+
+    # Blocks that may follow a day off after last_shift
+    allowed_next = {
+        last_shift: [b for b in B if B[b][0][1] not in forbidden[last_shift]] 
+        for last_shift in forbidden
+        }
 
     # Constraints (1)
-    m.addConstrs(
+    m._ctr_demand = m.addConstrs(
         quicksum(num_times * x[g_, b, h] 
-                 for (g_, b), num_times in C[g, s].items() for h in H) 
+                 for (g_, b), num_times in C[g, s].items() for h in H 
+                 if (g_, b, h) in x) 
         == staff_req[s][g]
         for g in G for s in S
         )
 
     # Constraints (2)
     m._ctr_num_employees = m.addConstr(
-            sum(num_cycles[g, b, h]*x[g, b, h] for g, b, h in x) 
+            quicksum(num_cycles[g, b, h]*x[g, b, h] for g, b, h in x) 
             == num_employees
             )
 
     # Constraints (3)
     m.addConstrs(
-        quicksum(
-            x[g, b, h] for g, b, h in x 
-            if g == i and (g + len(B[b]) + H[h]) % 7 == j) 
-        == v[i, j]
+        quicksum(stints_by_arc[i, j]) == v[i, j]
         for i, j in v
         )
 
@@ -91,19 +155,19 @@ def construct_compact_formulation(num_employees, num_days, num_shifts,
 
     # Constraints (13)
     m.addConstrs(
-        quicksum(
-                 x[g, b, 0] for (g, b), g_ in block_ending_day.items() 
-                 if g_ == g_curr and B[b][-1][1] == last_shift)
-        <= quicksum(
-            x[(g_curr + 2) % num_days, b, h] for h in H for b in B 
-            if B[b][0][1] not in forbidden[last_shift]
-            )
+        quicksum(x[g, b, 0] for g, b in blocks_by_end[g_curr, last_shift] 
+                 if (g, b, 0) in x)
+        <= quicksum(x.select(g_curr + 2, allowed_next[last_shift], None))
         for g_curr in G for last_shift in forbidden if H[0] == 1
         )
 
-    # Upper bound on x_{gbh}
-    m.addConstrs(
-        quicksum(x[g, b, h] for h in H) <= ub[g, b] for g in G for b in B
+    # Upper bound on x_{gbh}, unless it is implied by the variable bound
+    stints_by_block = collections.defaultdict(list)
+    for g, b, h in x:
+        stints_by_block[g, b].append(x[g, b, h])
+    m._ctr_ub = m.addConstrs(
+        quicksum(stints_by_block[g, b]) <= ub[g, b] 
+        for g, b in stints_by_block if len(stints_by_block[g, b]) > 1
         )
 
     m.Params.lazyConstraints = 1
@@ -111,6 +175,36 @@ def construct_compact_formulation(num_employees, num_days, num_shifts,
     # Expose model variables/parameters
     m._x = x
     m._v = v
+    m._C = C
     m._num_cycles = num_cycles
 
     return m
+
+
+def copy_compact_formulation(m, env=None):
+    """
+    Copy the compact formulation, such that the extensions of a problem variant
+    can be layered onto the copy without modifying the base model. The copy is
+    created in env, if given, and otherwise in the environment of the model.
+    """
+    m.update()
+    m_copy = m.copy(env=env)
+    m_copy.Params.lazyConstraints = 1
+    vars_copy, constrs_copy = m_copy.getVars(), m_copy.getConstrs()
+
+    x = CycleArray(*m._x.shape)
+    for key, var in m._x.items():
+        x[key] = vars_copy[var.index]
+    v = tupledict({key: vars_copy[var.index] for key, var in m._v.items()})
+
+    # Expose model variables/parameters
+    m_copy._x = x
+    m_copy._v = v
+    m_copy._num_cycles = m._num_cycles
+    m_copy._ctr_num_employees = constrs_copy[m._ctr_num_employees.index]
+    m_copy._ctr_demand = tupledict({key: constrs_copy[constr.index] 
+                                    for key, constr in m._ctr_demand.items()})
+    m_copy._ctr_ub = tupledict({key: constrs_copy[constr.index] 
+                                for key, constr in m._ctr_ub.items()})
+
+    return m_copy
@@ -0,0 +1,131 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import json
+import os
+
+
+def variant_name(variant):
+    """
+    Short name of a problem variant (see run.py), e.g., NE/RP or FW/MS10.
+    """
+    EMPLOYEE_OBJ, REST_PERIODS, WEEKEND_OBJ, COUNT_SOL = variant
+    parts = [name for name, active in (("NE", EMPLOYEE_OBJ), 
+                                       ("FW", WEEKEND_OBJ), 
+                                       ("RP", REST_PERIODS)) if active]
+    if COUNT_SOL:
+        parts.append("MS{}".format(COUNT_SOL))
+    return "/".join(parts) or "BP"
+
+
+def parse_variant(name):
+    """
+    Parse the short name of a problem variant, e.g., NE/RP or BP/MS10.
+    """
+    parts = set(name.upper().split("/"))
+    count_sol = 0
+    for part in list(parts):
+        if part.startswith("MS"):
+            count_sol = int(part[2:] or 10)
+            parts.remove(part)
+    unknown = parts - {"NE", "FW", "RP", "BP"}
+    if unknown:
+        raise ValueError("Unknown problem variant {}".format(name))
+    return ("NE" in parts, "RP" in parts, "FW" in parts, count_sol)
+
+
+def task_key(task):
+    """
+    Key of an (instance, variant) task, i.e., the path of the instance and the
+    problem variant.
+    """
+    path, EMPLOYEE_OBJ, REST_PERIODS, WEEKEND_OBJ, COUNT_SOL = task
+    return (os.path.normpath(path), bool(EMPLOYEE_OBJ), bool(REST_PERIODS), 
+            bool(WEEKEND_OBJ), int(COUNT_SOL))
+
+
+def record_key(record):
+    return task_key((record["path"], record["EMPLOYEE_OBJ"], 
+                     record["REST_PERIODS"], record["WEEKEND_OBJ"], 
+                     record["COUNT_SOL"]))
+
+
+def load_results(path):
+    """
+    Load the records of a results file (JSON lines) by task key. Incomplete 
+    lines, e.g., of an interrupted write, are skipped.
+    """
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                results[record_key(record)] = record
+            except (ValueError, KeyError, TypeError):
+                continue
+    return results
+
+
+def append_result(f, record):
+    """
+    Append a record to an open results file and flush it to disk, such that 
+    finished tasks survive a crash.
+    """
+    f.write(json.dumps(record) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def open_results(path):
+    """
+    Open a results file for appending. An incomplete last line is terminated,
+    such that it does not corrupt the next record.
+    """
+    f = open(path, "a+")
+    if f.tell() > 0:
+        f.seek(f.tell() - 1)
+        if f.read(1) != "\n":
+            f.write("\n")
+    return f
+
+
+def pending_tasks(tasks, results, retry_time_limit=False, 
+                  retry_errors=False):
+    """
+    Return the tasks without a record in results. With retry_time_limit, 
+    tasks that reached the time limit are solved again, and with retry_errors,
+    tasks that failed with an error.
+    """
+    retry = set()
+    if retry_time_limit:
+        retry.add("time limit")
+    if retry_errors:
+        retry.add("error")
+    pending = []
+    for task in tasks:
+        record = results.get(task_key(task))
+        if record is None or record["time"] in retry:
+            pending.append(task)
+    return pending
@@ -57,11 +57,25 @@ def cf_employee_obj(cf_model, staff_req, num_days, REST_PERIODS):
                     )
     cf_model.remove(cf_model._ctr_num_employees)
     lb, ub = calculate_employee_bounds(staff_req, num_days, REST_PERIODS)
-    cf_model.addConstr(
-        sum(cf_model._num_cycles[g, b, h]*x[g, b, h] for g, b, h in x) 
-        >= math.ceil(lb)
-        )
-    cf_model.addConstr(
-        sum(cf_model._num_cycles[g, b, h]*x[g, b, h] for g, b, h in x) 
-        <= math.floor(ub)
+    cf_model._ctr_employee_bounds = (
+        cf_model.addConstr(
+            quicksum(cf_model._num_cycles[g, b, h]*x[g, b, h] 
+                     for g, b, h in x) 
+            >= math.ceil(lb)
+            ), 
+        cf_model.addConstr(
+            quicksum(cf_model._num_cycles[g, b, h]*x[g, b, h] 
+                     for g, b, h in x) 
+            <= math.floor(ub)
+            )
         )
+
+
+def update_employee_bounds(cf_model, staff_req, num_days, REST_PERIODS):
+    """
+    Update E_{lb} and E_{ub} in place after the demand has changed.
+    """
+    lb, ub = calculate_employee_bounds(staff_req, num_days, REST_PERIODS)
+    ctr_lb, ctr_ub = cf_model._ctr_employee_bounds
+    ctr_lb.RHS = math.ceil(lb)
+    ctr_ub.RHS = math.floor(ub)
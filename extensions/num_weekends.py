@@ -21,35 +21,15 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
-import itertools
 from gurobipy import quicksum, GRB
 
 
-def cf_weekend_obj(cf_model, num_days, blocks, min_off, max_off):
+def cf_weekend_obj(cf_model, stints):
     """
-    Compute number of free weekends per stint and modify compact formulation to 
-    maximize the number of free weekends.
+    Modify compact formulation to maximize the number of free weekends, using 
+    the number of free weekends per stint of the stint table stints.
     """
-    G = range(num_days)
-    B = range(len(blocks))
-    H = {idx: val for idx, val in enumerate(range(min_off, max_off + 1))}
-    free_weekends = {}
-    for g, b, h in itertools.product(G, B, H):
-        stint = []
-        for g_offset, s in enumerate(blocks[b]):
-            curr = (g + g_offset) % 7
-            stint.append((curr, s))
-        curr_g = stint[-1][0] + 1
-        for _ in range(H[h]):
-            stint.append((curr_g % 7, 3))
-            curr_g += 1
-        num_we = 0
-        for idx in range(len(stint)):
-            if stint[idx][0] == 4 and stint[idx][1] != 2:
-                if len(stint) >= idx + 3:
-                    if stint[idx+1][1] == 3 and stint[idx+2][1] == 3:
-                        num_we += 1
-        free_weekends[g, b, h] = num_we
+    free_weekends = stints.lookup("free_weekends", cf_model._x.keys())
 
     cf_model._free_we = free_weekends
 
@@ -21,65 +21,71 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
+import numpy as np
 from gurobipy import quicksum
 
+from stint_table import WEEK, week_days
 
-def cf_rest_period_ctr(cf_model, num_days, B, H, forbidden):
+# Days 1-5 of a week and days 0-2 of every week of a bitmask
+_mid_week = 0b0111110
+_week_begin = sum(0b111 << (7 * week) for week in range(9))
+
+
+def cf_rest_period_ctr(cf_model, stints, forbidden):
     """
-    Modify compact formulation to enforce rest period constraints.
+    Modify compact formulation to enforce rest period constraints. The stints
+    are classified by their bitmasks of worked days and days off relative to 
+    the week of their start day (see stint_table.py).
     """
     x = cf_model._x
-    infeas_stints = [(0, 7), (0, 6), (1, 6), (1, 7), (6, 7)]
-    for g_, bl in infeas_stints:
-        cf_model.addConstrs(
-            x[g, b, h] == 0 
-            for g, b, h in x if (g % 7) == g_ and len(B[b]) == bl
-            )
-    cf_model.addConstrs(
-        x[g, b, h] == 0 
-        for g, b, h in x if (g % 7) == 4 and len(B[b]) == 6 and h == 0
-        )
-
-    cf_model.addConstrs(
-        x[g, b, h] == 0 
-        for g, b, h in x if (g + len(B[b]) - 1) % 7 in [2, 3, 4, 5] 
-        and H[h] == 1
-        )
+    num_days = stints.num_days
+    keys = list(x.keys())
+    idx = tuple(np.array(keys).T)
+    g, h = idx[0], idx[2]
+    block_len, days_off = stints.block_len[idx], stints.days_off[idx]
+    work, off = stints.work_mask[idx], stints.off_mask[idx]
 
-    weekly_rest = {w: {} for w in range(0, num_days//7)}
-    for week in range(0, num_days//7):
-        start_one = {1+week*7: [], 2+week*7: [], 3+week*7: []}
-        for g, b, h in x:
-            if g in start_one:
-                if g + len(B[b]) - 1 <= 5+week*7:
-                    start_one[g].append((g, b, h))
-        weekly_rest[week]["start_one"] = start_one
+    # Stints that violate the rest periods are fixed by their bounds, e.g., 
+    # blocks that cover six or more days of a week
+    covers_week = np.zeros(len(keys), dtype=bool)
+    for week in range(int(stints.length.max()) // 7 + 2):
+        covers_week |= week_days(work, week) >= 6
+    infeasible = (covers_week 
+                  | ((g % 7 == 4) & (block_len == 6) & (h == 0)) 
+                  | (np.isin(stints.last_day[idx] % 7, [2, 3, 4, 5]) 
+                     & (days_off == 1)))
+    for key in np.array(keys)[infeasible].tolist():
+        x[tuple(key)].UB = 0
 
-        end_one = {0+week*7: [], 1+week*7: [], 2+week*7: []}
-        for g, b, h in x:
-            first_day_off = (g + len(B[b])) % num_days
-            days_off = [first_day_off]
-            for h_ in range(1, H[h]):
-                days_off.append(first_day_off + h_)
-            days_off_begin = sum([1 for i in days_off 
-                                  if i in [0+week*7, 1+week*7, 2+week*7]])
-            if days_off_begin == 1 and days_off[-1] <= 2+week*7:
-                end_one[days_off[-1]].append((g, b, h))
-        weekly_rest[week]["end_one"] = end_one
+    # Blocks starting on days 1-3 of a week that end by day 5, and stints 
+    # with a single day off on days 0-2 of a week, by the day off
+    is_start_one = np.isin(g % 7, [1, 2, 3]) & (work & ~_mid_week == 0)
+    is_end_one = (days_off == 1) & (off & _week_begin != 0)
+    end_days = [7*week + day for week in range(num_days // 7) 
+                for day in range(3)]
+    start_one = {end + 1: [] for end in end_days}
+    end_one = {end: [] for end in end_days}
+    next_start = stints.end[idx]
+    for key, start, end, end_day in zip(keys, is_start_one.tolist(), 
+                                        is_end_one.tolist(), 
+                                        next_start.tolist()):
+        if start:
+            start_one[key[0]].append(key)
+        if end:
+            end_one[(end_day - 1) % num_days].append(key)
 
     cf_model.addConstrs(
-        quicksum(x[key] for key in weekly_rest[w]["end_one"][end]) 
-        <= quicksum(x[key] for key in weekly_rest[w]["start_one"][end+1]) 
-        for w in weekly_rest for end in weekly_rest[w]["end_one"]
+        quicksum(x[key] for key in end_one[end]) 
+        <= quicksum(x[key] for key in start_one[end + 1]) 
+        for end in end_one
         )
 
+    # Forbidden sequences across a single day off, if it is allowed
     for last_s in forbidden:
         cf_model.addConstrs(
-            quicksum(x[g, b, h] for g, b, h in weekly_rest[w]["end_one"][end] 
-                     if B[b][-1][1] == last_s and H[h] == 1) 
-            <= quicksum(x[g, b, h] 
-                        for g, b, h in weekly_rest[w]["start_one"][end+1] 
-                        if B[b][0][1] not in forbidden[last_s]) 
-            for w in weekly_rest for end in weekly_rest[w]["end_one"] 
-            if H[0] == 1
+            quicksum(x[g, b, h] for g, b, h in end_one[end] 
+                     if stints.last_shift[g, b, h] == last_s) 
+            <= quicksum(x[g, b, h] for g, b, h in start_one[end + 1] 
+                        if stints.first_shift[g, b, h] not in forbidden[last_s])
+            for end in end_one if stints.min_days_off == 1
             )
@@ -25,50 +25,92 @@ import collections
 from itertools import product
 from gurobipy import Model, GRB, quicksum
 import math
+import numpy as np
+from time import time
+from separation import connected_components
+from symmetry import rotations
 
 
-class PlanningCycle:
+class Deadline:
     """
-    Helper class in computing the number of planning cycles in a stint.
+    Wall-clock deadline of a run, which is passed down to all solves of the 
+    compact formulation and the subproblem.
     """
-    def __init__(self, start_day, num_days):
-        self.start_day = start_day
-        self.num_days = num_days
-        self.weeks = 0 
-        if self.start_day == 0:
-            self.weeks += 1
+    def __init__(self, time_limit):
+        self.start = time()
+        self.end = self.start + time_limit
 
-    def next(self):
-        if self.start_day == self.num_days - 1:
-            self.start_day = 0
-            self.weeks += 1
-        else:
-            self.start_day += 1
-        return self.start_day
+    def remaining(self):
+        return max(0, self.end - time())
+
+    def elapsed(self):
+        return time() - self.start
 
+    def expired(self):
+        return time() >= self.end
 
-def get_num_planning_cycles(first_day_of_block, last_day_of_block, days_off, 
-                            num_days, len_block):
+
+def update_progress(run_data, deadline, progress=None, cf_objective=None, 
+                    bound=None):
     """
-    Compute number of planning cycles in a stint.
+    Record the objective value of the last compact formulation solution and 
+    the best bound on the objective value of the problem variant in run_data, 
+    and report them to the progress callback. As the compact formulation is a
+    relaxation, its bounds remain valid for the problem variant.
     """
-    day_before_next_block = (last_day_of_block + days_off) % num_days
-    next_start = PlanningCycle(first_day_of_block, num_days)
-    counter = 1
-    next_start.next()
-    while next_start.start_day != last_day_of_block or counter < len_block - 1:
-        next_start.next()
-        counter += 1
-    next_start.next()
-    while next_start.start_day != day_before_next_block:
-        next_start.next()
+    if cf_objective is not None:
+        run_data.cf_objective = cf_objective
+    if bound is not None and bound < GRB.INFINITY and bound > -GRB.INFINITY:
+        # Objective values are integral
+        if run_data.EMPLOYEE_OBJ:
+            bound = math.ceil(bound - 1e-6)
+            if run_data.bound is None or bound > run_data.bound:
+                run_data.bound = bound
+        elif run_data.WEEKEND_OBJ:
+            bound = math.floor(bound + 1e-6)
+            if run_data.bound is None or bound < run_data.bound:
+                run_data.bound = bound
+    if progress is not None:
+        progress({"path": run_data.path, 
+                  "iteration": run_data.stats.counters["iterations"], 
+                  "elapsed": deadline.elapsed(), 
+                  "cf_objective": run_data.cf_objective, 
+                  "bound": run_data.bound})
+
 
-    return next_start.weeks
+def track_progress(callback):
+    """
+    Wrap a callback of the compact formulation, such that new solutions are 
+    reported by update_progress and the solve terminates at the deadline.
+    """
+    def tracked(model, where):
+        callback(model, where)
+        if where == GRB.Callback.MIPSOL:
+            update_progress(model._run_data, model._deadline, model._progress,
+                            model.cbGet(GRB.Callback.MIPSOL_OBJ), 
+                            model.cbGet(GRB.Callback.MIPSOL_OBJBND))
+            if model._deadline.expired():
+                model.terminate()
+    return tracked
+
+
+def improves_incumbent(model, tol=1e-6):
+    """
+    Check within a MIPSOL callback whether the new solution improves on the
+    incumbent. Other solutions cannot become the incumbent, such that their
+    subproblems need not be solved.
+    """
+    obj = model.cbGet(GRB.Callback.MIPSOL_OBJ)
+    best = model.cbGet(GRB.Callback.MIPSOL_OBJBST)
+    return model.ModelSense * (obj - best) < -tol
 
 
 def subcyclecuts(model, where):
     """
-    Callback for adding connecting cuts.
+    Callback for the compact formulation. Adds the bound on the employee 
+    objective, the connecting cuts (5) for disconnected solutions and, for
+    the lazy subproblem, the no-goods (12) for solutions whose subproblem is
+    infeasible.
     """
     if model._run_data.EMPLOYEE_OBJ and where == GRB.Callback.MIPSOL:
         try:
@@ -78,93 +120,160 @@ def subcyclecuts(model, where):
 
         if (bound - round(bound)) > 0.01 and bound != math.ceil(bound):
             model.cbLazy(model._empl_obj >= math.ceil(bound))
+            model._run_data.stats.count("lazy_cuts_employee_bound")
 
     if where == GRB.Callback.MIPSOL:
         vals = model.cbGetSolution(model._v)
         edges = [(i, j) for i, j in model._v.keys() if vals[i, j] > 0.5]
-        st = get_segments(list(edges))
+        st = get_segments(edges)
         if len(st) > 1:
-            # Constraints (5)
-            model.cbLazy(quicksum(model._v[k] for k in edges) 
-                         <= sum(vals[k] for k in edges) - 1)
+            # Constraints (5) for every segment, relaxed by the flow leaving
+            # the days of the segment. The sum of the upper bounds of v over
+            # the segment bounds its left-hand side, such that solutions in 
+            # which the segment is connected to other days are not cut off
+            for segment in st:
+                days = {i for e in segment for i in e}
+                big_m = sum(model._v[k].UB for k in segment)
+                outflow = quicksum(model._v[i, j] for i, j in model._v.keys() 
+                                   if i in days and j not in days)
+                model.cbLazy(
+                    quicksum(model._v[k] for k in segment) 
+                    <= sum(vals[k] for k in segment) - 1 + big_m*outflow
+                    )
+                model._run_data.stats.count("lazy_cuts_5")
+        elif model._lazy_subproblem:
+            if not improves_incumbent(model):
+                model._run_data.stats.count("lazy_skipped_solutions")
+                return
+            x_keys, x_vars = zip(*model._x.items())
+            x_vals = model.cbGetSolution(list(x_vars))
+            cf_sol = [key for key, val in zip(x_keys, x_vals) 
+                      for _ in range(int(round(val)))]
+            status, _ = model._solve_subproblem(cf_sol)
+            if status == 3:
+                # The deadline was reached within the subproblem
+                model.terminate()
+            elif status == 2:
+                # Constraints (12), also for the rotations of the solution
+                for rotated in rotations(model._x, x_vals, 
+                                         model._nogood_shifts):
+                    model.cbLazy(
+                        quicksum(var for var, val in zip(x_vars, rotated) 
+                                 if val > 0.1) 
+                        <= len(cf_sol) - 1
+                        )
+                    model._lazy_nogoods.append(
+                        [(key, val) for key, val in zip(x_keys, rotated) 
+                         if val > 0.1])
+                    model._run_data.stats.count("lazy_cuts_12")
 
 
 def get_segments(edges):
     """
     Separation Procedure (Figure 6)
     """
-    segments = []
-
-    while edges:
-        partial = set(edges[0])
-        partial_edges = [edges[0]]
-        del edges[0]
-
-        changed = True
-        while changed:
-            changed = False
-            for i, j in edges:
-                if i in partial or j in partial:
-                    partial.add(i)
-                    partial.add(j)
-                    partial_edges.append((i, j))
-                    edges.remove((i, j))
-                    changed = True
-                    break
-        segments.append(partial_edges)
+    return [segment for _, segment in connected_components(edges)]
 
-    return segments
 
-
-class cycledict(dict):
+class CycleArray:
     """
-    Dictionary with cyclic indexing
+    Dense array with cyclic indexing. Entries are stored in a flat list, while
+    a NumPy array of precomputed offsets supports vectorized slicing.
     """
-    def __init__(self, *args):
-        super().__init__
-        self.keys = [i for i in args]
+    def __init__(self, *shape):
+        self.shape = shape
+        self.size = int(np.prod(shape))
+        self._strides = [int(np.prod(shape[idx+1:])) 
+                         for idx in range(len(shape))]
+        self._data = [None] * self.size
+        self._index = None
 
-    def __getitem__(self, key):
+    def _offset(self, key):
         if not isinstance(key, tuple):
-            return dict.__getitem__(self, key % self.keys[0])
-        else:
-            key = [i for i in key]
-            for idx, i in enumerate(key):
-                if i < 0:
-                    key[idx] = self.keys[idx] + i
-                else:
-                    key[idx] = i % self.keys[idx]
-            return dict.__getitem__(self, tuple(key))
+            return key % self.shape[0]
+        offset = 0
+        for i, n, stride in zip(key, self.shape, self._strides):
+            offset += (i % n) * stride
+        return offset
+
+    def __getitem__(self, key):
+        return self._data[self._offset(key)]
 
     def __setitem__(self, key, value):
-        if not isinstance(key, tuple):
-            super(cycledict, self).__setitem__(key % self.keys[0], value)
-        else:
-            key = [i for i in key]
-            for idx, i in enumerate(key):
-                if i < 0:
-                    key[idx] = self.keys[idx] + i
-                else:
-                    key[idx] = i % self.keys[idx]
-            super(cycledict, self).__setitem__(tuple(key), value)
+        self._data[self._offset(key)] = value
+
+    def __contains__(self, key):
+        return self._data[self._offset(key)] is not None
+
+    def __len__(self):
+        return sum(1 for value in self._data if value is not None)
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        for key, value in zip(product(*[range(n) for n in self.shape]), 
+                              self._data):
+            if value is not None:
+                yield key
+
+    def values(self):
+        return (value for value in self._data if value is not None)
+
+    def items(self):
+        for key, value in zip(product(*[range(n) for n in self.shape]), 
+                              self._data):
+            if value is not None:
+                yield key, value
+
+    def get(self, key, default=None):
+        value = self._data[self._offset(key)]
+        return default if value is None else value
+
+    def select(self, *index):
+        """
+        Return the entries of a slice, e.g., select(g, None, h) for all 
+        entries with start day g and day off sequence h. Each component is
+        either None, an integer or an array of integers (indexed cyclically).
+        """
+        if self._index is None:
+            self._index = np.arange(self.size).reshape(self.shape)
+        index = np.ix_(*[np.arange(n) if i is None 
+                         else np.mod(np.atleast_1d(i).astype(np.intp), n) 
+                         for i, n in zip(index, self.shape)])
+        data = self._data
+        return [data[offset] for offset in self._index[index].ravel() 
+                if data[offset] is not None]
 
 
 class ShiftModel(Model):
     """
     gurobipy Model with cyclic decision variables
     """
-    def __init__(self, *args):
-        super().__init__(*args)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
     
-    def addCyclicVars(self, *indices, lb=0, ub=GRB.INFINITY, 
+    def addCyclicVars(self, *indices, keys=None, lb=0, ub=GRB.INFINITY, 
                       vtype=GRB.CONTINUOUS, name="C"):
-        
-        var = cycledict(*indices)
-        
-        for key in product(*[range(i) for i in indices]):
-            var[key] = self.addVar(lb=lb, ub=ub, vtype=vtype, 
-                                   name=name+'_'+'_'.join(str(i) for i in key))
-        
+        """
+        Add cyclic variables, either for all indices or only for the given 
+        keys. Bounds may be given per key as dictionaries.
+        """
+        var = CycleArray(*indices)
+        # Variables are created in a single call, in the order of the offsets
+        if keys is None:
+            var._data = list(self.addVars(*indices, lb=lb, ub=ub, vtype=vtype, 
+                                          name=name).values())
+        else:
+            keys = list(keys)
+            if isinstance(lb, dict):
+                lb = [lb[key] for key in keys]
+            if isinstance(ub, dict):
+                ub = [ub[key] for key in keys]
+            new_vars = self.addVars(keys, lb=lb, ub=ub, vtype=vtype, name=name)
+            for key in keys:
+                var[key] = new_vars[key]
+
         return var
 
 
@@ -172,7 +281,7 @@ def construct_coverage_set(G, S, B):
     """
     Compute coverage of start day and work stretch combinations
     """
-    Coverage = cycledict(len(G), len(S))
+    Coverage = CycleArray(len(G), len(S))
     for g, s in product(G, S):
         Coverage[g, s] = collections.defaultdict(lambda: 0)
 
@@ -0,0 +1,117 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import os
+import random
+
+from reader import shift_names
+
+
+def generate_instance(num_employees, num_shifts=3, density=0.7, 
+                      forbidden_density=0.3, seed=0):
+    """
+    Generate a random RWSP instance. On each day, about a share density of the
+    employees is required, which is distributed randomly across the shift 
+    types. Transitions to an earlier shift type are forbidden 
+    with probability forbidden_density, directly (forbidden) or after a single
+    day off (forbidden3). Instances with the same parameters and seed are 
+    identical.
+    """
+    if not 1 <= num_shifts <= len(shift_names):
+        raise ValueError("Number of shift types must be between 1 and {}"
+                         .format(len(shift_names)))
+    rnd = random.Random(seed)
+    S = range(num_shifts)
+
+    # Every shift type is required on every day, the remaining demand of a 
+    # day is distributed randomly
+    demand = [[1] * 7 for _ in S]
+    weights = [rnd.uniform(0.5, 1.5) for _ in S]
+    for d in range(7):
+        num_working = round(num_employees * density + rnd.uniform(-1, 1))
+        for s in rnd.choices(S, weights, k=max(0, num_working - num_shifts)):
+            demand[s][d] += 1
+
+    min_shift = [2] * num_shifts
+    max_shift = [rnd.randint(4, 7) for _ in S]
+    min_off = rnd.randint(1, 2)
+    max_off = rnd.randint(max(min_off, 3), 4)
+    min_on = rnd.randint(2, 4)
+    max_on = rnd.randint(max(min_on, 5), 7)
+
+    # Shift types are indexed from one in the instance files
+    forbidden = [sorted(s_ + 1 for s_ in range(s) 
+                        if rnd.random() < forbidden_density) 
+                 for s in S]
+    forbidden3 = [[s + 1, 0, s_ + 1] for s in S for s_ in range(s) 
+                  if rnd.random() < forbidden_density]
+
+    return {
+        "groups": num_employees, "numShifts": num_shifts, "demand": demand,
+        "minShift": min_shift, "maxShift": max_shift, "minOff": min_off, 
+        "maxOff": max_off, "minOn": min_on, "maxOn": max_on, 
+        "forbidden": forbidden, "forbidden3": forbidden3
+        }
+
+
+def format_dzn(data):
+    """
+    Format a generated instance in the format of the problem instance files.
+    """
+    lines = []
+    for name, value in data.items():
+        if name in ("demand", "forbidden3"):
+            rows = [", ".join(str(i) for i in row) for row in value]
+            indent = " " * (len(name) + 3)
+            value = ("[| " + ",\n{}| ".format(indent).join(rows) + " |]" 
+                     if rows else "[| |]")
+        elif name == "forbidden":
+            value = "[" + ", ".join(
+                "{" + ",".join(str(i) for i in row) + "}" 
+                for row in value) + "]"
+        elif isinstance(value, list):
+            value = "[" + ", ".join(str(i) for i in value) + "]"
+        lines.append("{} = {};".format(name, value))
+    return "\n".join(lines) + "\n"
+
+
+def write_instances(directory, sizes, num_shifts=(3,), densities=(0.7,), 
+                    forbidden_density=0.3, seed=0):
+    """
+    Write one instance for each combination of number of employees, number of
+    shift types and demand density to a directory and return their paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for num_employees in sizes:
+        for n in num_shifts:
+            for density in densities:
+                data = generate_instance(num_employees, n, density, 
+                                         forbidden_density, seed)
+                name = "gen_e{}_s{}_d{}_seed{}.dzn".format(
+                    num_employees, n, round(100 * density), seed)
+                path = os.path.join(directory, name)
+                with open(path, "w") as f:
+                    f.write(format_dzn(data))
+                paths.append(path)
+    return paths
@@ -0,0 +1,193 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import collections
+import cProfile
+import io
+import json
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from time import perf_counter
+from gurobipy import GRB
+
+# cProfile and tracemalloc are process-wide, such that only one phase is 
+# profiled at a time
+_profiling = threading.Lock()
+
+
+class Stats:
+    """
+    Instrumentation of a single run: wall time per phase, counters and model 
+    sizes. Phases may be nested, such that the time of a phase includes the 
+    time of its nested phases. If profile is True (or a collection of phase 
+    names), phases are additionally profiled with cProfile and tracemalloc. 
+    With trace_memory, only the peak memory of the phases is traced.
+    """
+    def __init__(self, profile=False, trace_memory=False):
+        self.phases = collections.defaultdict(float)
+        self.calls = collections.Counter()
+        self.counters = collections.Counter()
+        self.model_sizes = {}
+        self.peak_memory = {}
+        self.profiles = {}
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Measure the wall time of a phase.
+        """
+        profiled = self._profiled(name)
+        traced = ((profiled or self.trace_memory) 
+                  and _profiling.acquire(blocking=False))
+        profiled = profiled and traced
+        if traced:
+            tracing = tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+        if profiled:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        start_time = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start_time
+            if profiled:
+                profiler.disable()
+            if traced:
+                _, peak = tracemalloc.get_traced_memory()
+                if not tracing:
+                    tracemalloc.stop()
+                _profiling.release()
+            with self._lock:
+                self.phases[name] += elapsed
+                self.calls[name] += 1
+                if traced:
+                    self.peak_memory[name] = max(
+                        peak, self.peak_memory.get(name, 0))
+                if profiled:
+                    if name in self.profiles:
+                        self.profiles[name].add(profiler)
+                    else:
+                        self.profiles[name] = pstats.Stats(profiler)
+
+    def _profiled(self, name):
+        if isinstance(self.profile, bool):
+            return self.profile
+        return name in self.profile
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def add(self, other):
+        """
+        Add the phases, counters and model sizes of other to these stats.
+        """
+        with self._lock:
+            for name, elapsed in other.phases.items():
+                self.phases[name] += elapsed
+            self.calls.update(other.calls)
+            self.counters.update(other.counters)
+            self.model_sizes.update(other.model_sizes)
+            for name, peak in other.peak_memory.items():
+                self.peak_memory[name] = max(
+                    peak, self.peak_memory.get(name, 0))
+            for name, profile in other.profiles.items():
+                if name in self.profiles:
+                    self.profiles[name].add(profile)
+                else:
+                    self.profiles[name] = pstats.Stats(profile)
+
+    def record_model(self, name, model):
+        """
+        Record the size of a gurobipy model.
+        """
+        model.update()
+        self.model_sizes[name] = {
+            "vars": model.NumVars, "int_vars": model.NumIntVars, 
+            "constrs": model.NumConstrs, "nonzeros": model.NumNZs
+            }
+
+    def profile_summary(self, name, limit=20):
+        """
+        Return the functions of a profiled phase with the largest cumulative 
+        time as text.
+        """
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream).add(self.profiles[name])
+        stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+    def as_dict(self, limit=20):
+        """
+        Return the instrumentation as a JSON-serializable dictionary.
+        """
+        with self._lock:
+            return {
+                "phases": dict(self.phases),
+                "calls": dict(self.calls),
+                "counters": dict(self.counters),
+                "model_sizes": dict(self.model_sizes),
+                "peak_memory": dict(self.peak_memory),
+                "profiles": {name: self.profile_summary(name, limit) 
+                             for name in self.profiles}
+                }
+
+
+def timed_callback(callback, name="callback"):
+    """
+    Wrap a Gurobi callback, such that its invocations for new incumbents 
+    (MIPSOL) are timed in the stats of the model's run_data.
+    """
+    def timed(model, where):
+        if where != GRB.Callback.MIPSOL:
+            return callback(model, where)
+        with model._run_data.stats.phase(name):
+            callback(model, where)
+    return timed
+
+
+def run_record(run_data):
+    """
+    Return run_data as a JSON-serializable dictionary.
+    """
+    record = dict(vars(run_data))
+    stats = record.get("stats")
+    if isinstance(stats, Stats):
+        record["stats"] = stats.as_dict()
+    return record
+
+
+def to_json(run_data, **kwargs):
+    """
+    Export run_data including its instrumentation as JSON.
+    """
+    return json.dumps(run_record(run_data), **kwargs)
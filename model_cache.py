@@ -0,0 +1,167 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import hashlib
+import os
+import pickle
+from gurobipy import Env, GurobiError, read, tupledict
+from helper import CycleArray
+
+# Increase whenever the construction of the compact formulation changes, such
+# that models built by a previous version are not reused
+CACHE_VERSION = 6
+
+
+class ModelCache:
+    """
+    On-disk cache of base compact formulations, keyed by the content of the 
+    problem instance. Each entry consists of the model in MPS format and a 
+    sidecar file with the index of the decision variables, the number of 
+    planning cycles and the coverage set. If the cache exceeds max_size bytes,
+    the least recently used entries are evicted.
+    """
+    def __init__(self, directory, max_size=2**30):
+        self.directory = directory
+        self.max_size = max_size
+        self._env = None
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, *instance_data):
+        """
+        Compute the content hash of a problem instance.
+        """
+        content = repr((CACHE_VERSION, instance_data)).encode()
+        return hashlib.sha256(content).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".mps", base + ".pkl"
+
+    def load(self, key):
+        """
+        Load the base model stored for key, or return None on a cache miss.
+        Corrupt entries are removed.
+        """
+        model_path, sidecar_path = self._paths(key)
+        if self._env is None:
+            self._env = Env(empty=True)
+            self._env.setParam("OutputFlag", 0)
+            self._env.start()
+        try:
+            with open(sidecar_path, "rb") as f:
+                sidecar = pickle.load(f)
+            m = read(model_path, env=self._env)
+        except OSError:
+            return None
+        except (pickle.UnpicklingError, EOFError, GurobiError):
+            self.remove(key)
+            return None
+        # Mark entry as recently used
+        os.utime(model_path)
+        os.utime(sidecar_path)
+
+        m.setParam("OutputFlag", 0)
+        m.Params.lazyConstraints = 1
+        m_vars = m.getVars()
+
+        x = CycleArray(*sidecar["x_shape"])
+        for key_, idx in sidecar["x"].items():
+            x[key_] = m_vars[idx]
+        C = CycleArray(*sidecar["C_shape"])
+        for key_, coverage in sidecar["C"].items():
+            C[key_] = coverage
+
+        # Expose model variables/parameters
+        m._x = x
+        m._v = tupledict({key_: m_vars[idx] 
+                          for key_, idx in sidecar["v"].items()})
+        m._C = C
+        m._num_cycles = sidecar["num_cycles"]
+        m_constrs = m.getConstrs()
+        m._ctr_num_employees = m_constrs[sidecar["ctr_num_employees"]]
+        m._ctr_demand = tupledict({key_: m_constrs[idx] 
+                                   for key_, idx in sidecar["demand"].items()})
+        m._ctr_ub = tupledict({key_: m_constrs[idx] 
+                               for key_, idx in sidecar["ub"].items()})
+
+        return m
+
+    def store(self, key, m):
+        """
+        Store the base model for key and evict entries if the cache is full.
+        """
+        m.update()
+        sidecar = {
+            "x_shape": m._x.shape,
+            "x": {key_: var.index for key_, var in m._x.items()},
+            "v": {key_: var.index for key_, var in m._v.items()},
+            "C_shape": m._C.shape,
+            "C": {key_: dict(coverage) for key_, coverage in m._C.items()},
+            "num_cycles": m._num_cycles,
+            "ctr_num_employees": m._ctr_num_employees.index,
+            "demand": {key_: c.index for key_, c in m._ctr_demand.items()},
+            "ub": {key_: c.index for key_, c in m._ctr_ub.items()},
+        }
+        model_path, sidecar_path = self._paths(key)
+        # Write to temporary files first, such that concurrent workers never 
+        # read an incomplete entry
+        tmp_model_path = os.path.join(
+            self.directory, ".{}.{}.mps".format(key, os.getpid()))
+        tmp_sidecar_path = sidecar_path + ".{}.tmp".format(os.getpid())
+        m.write(tmp_model_path)
+        with open(tmp_sidecar_path, "wb") as f:
+            pickle.dump(sidecar, f)
+        os.replace(tmp_model_path, model_path)
+        os.replace(tmp_sidecar_path, sidecar_path)
+
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits max_size.
+        """
+        entries = {}
+        for name in os.listdir(self.directory):
+            key, ext = os.path.splitext(name)
+            if ext not in (".mps", ".pkl") or key.startswith("."):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            last_used, size = entries.get(key, (0, 0))
+            entries[key] = (max(last_used, stat.st_mtime), size + stat.st_size)
+
+        total_size = sum(size for _, size in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k][0]):
+            if total_size <= self.max_size:
+                break
+            self.remove(key)
+            total_size -= entries[key][1]
+
+    def remove(self, key):
+        """
+        Remove the entry stored for key.
+        """
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,227 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from time import time
+from gurobipy import Env, GRB, quicksum
+
+from helper import Deadline, update_progress
+from subproblem import subproblem
+from symmetry import rotations
+
+
+@contextmanager
+def worker_envs(envs, num_workers):
+    """
+    Provide a queue of Gurobi environments for the subproblem workers, which
+    must not share environments. If envs is None, num_workers environments 
+    are started and disposed on exit, otherwise envs are used.
+    """
+    started = []
+    idle = queue.Queue()
+    try:
+        if envs is None:
+            for _ in range(num_workers):
+                env = Env(empty=True)
+                started.append(env)
+                env.setParam("OutputFlag", 0)
+                env.start()
+            envs = started
+        for env in envs:
+            idle.put(env)
+        yield idle
+    finally:
+        for env in started:
+            env.dispose()
+
+
+def add_nogood(cf_model, x_vars, vals):
+    """
+    Cut off a compact formulation solution with an infeasible subproblem, and
+    its rotations by cf_model._nogood_shifts, whose subproblems are infeasible
+    as well. The no-goods are recorded in cf_model._nogoods.
+    """
+    for rotated in rotations(cf_model._x, vals, cf_model._nogood_shifts):
+        # Constraints (12)
+        cf_model._nogoods.append(cf_model.addConstr(
+            quicksum(var for var, val in zip(x_vars, rotated) if val > 0.1) 
+            <= sum(rotated) - 1))
+        cf_model._run_data.stats.count("nogoods_12")
+
+
+def exclude_solution(cf_model, x_vars, vals):
+    """
+    Exclude a feasible compact formulation solution from the search for further 
+    solutions. The exclusion is recorded in cf_model._temporary, as it only 
+    applies to the current search. Constraints (15) and (16) are listed in 
+    cf_model._indicators with the value of ms_helper that enforces them, such
+    that backends without big-M constraints can use indicators.
+    """
+    M = 20
+    ms_helper = cf_model.addVar(vtype=GRB.BINARY)
+    support = [var for var, val in zip(x_vars, vals) if val > 0.5]
+    # Constraints (15) and (16)
+    ctr_15 = cf_model.addConstr(
+        quicksum(support) <= sum(vals) - 1 + M*(1 - ms_helper)
+        )
+    ctr_16 = cf_model.addConstr(
+        quicksum(support) >= sum(vals) + 1 - M*ms_helper
+        )
+    cf_model._indicators[ctr_15] = (ms_helper, 1)
+    cf_model._indicators[ctr_16] = (ms_helper, 0)
+    cf_model._temporary += [ms_helper, ctr_15, ctr_16]
+    cf_model._run_data.stats.count("exclusions_15_16")
+
+
+def bound_objective(cf_model, run_data, obj_val):
+    """
+    Restrict further solutions to the objective value of the first solution.
+    The restriction is recorded in cf_model._temporary.
+    """
+    x = cf_model._x
+    if run_data.EMPLOYEE_OBJ:
+        cf_model._temporary.append(cf_model.addConstr(
+            quicksum(cf_model._num_cycles[g, b, h]*x[g, b, h] 
+                     for g, b, h in x) >= obj_val
+            ))
+    if run_data.WEEKEND_OBJ:
+        cf_model._temporary.append(cf_model.addConstr(
+            quicksum(cf_model._free_we[g, b, h]*x[g, b, h] 
+                     for g, b, h in x) <= obj_val
+            ))
+
+
+def find_multiple_solutions(cf_model, instance, run_data, callback, 
+                            time_limit=1000, threads=0, num_workers=4, 
+                            deadline=None, envs=None):
+    """
+    Find run_data.COUNT_SOL solutions. Each solve collects up to the number of 
+    missing solutions in Gurobi's solution pool, whose subproblems are checked
+    concurrently. Solutions are only excluded iteratively if the pool does not 
+    contain sufficiently many solutions with feasible subproblems. All solves
+    share the deadline, which by default ends after time_limit seconds.
+
+    The subproblems are checked by one worker per environment in envs, or by 
+    num_workers workers with environments of their own for this call.
+    """
+    if deadline is None:
+        deadline = Deadline(time_limit)
+    x_keys, x_vars = zip(*cf_model._x.items())
+    sp_cache = instance.sp_cache
+    stats = run_data.stats
+    num_sol = 0
+    first_solve = True
+
+    def check(cf_sol):
+        env = idle_envs.get()
+        try:
+            with stats.phase("subproblem"):
+                return subproblem(cf_sol, instance.B, instance.H, 
+                                  instance.forbidden, instance.num_days, 
+                                  run_data.REST_PERIODS, threads=threads, 
+                                  env=env, stats=stats, deadline=deadline, 
+                                  stints=instance.stints)
+        finally:
+            idle_envs.put(env)
+
+    if envs is not None:
+        num_workers = len(envs)
+    start_time = time()
+    cf_model.setParam("PoolSearchMode", 2)
+    with worker_envs(envs, num_workers) as idle_envs, \
+            ThreadPoolExecutor(max_workers=num_workers) as pool:
+        while True:
+            stats.count("iterations")
+            cf_model.setParam("PoolSolutions", run_data.COUNT_SOL - num_sol)
+            cf_model.setParam("TimeLimit", deadline.remaining())
+            with stats.phase("compact_solve"):
+                cf_model.optimize(callback)
+            stats.count("nodes", int(cf_model.NodeCount))
+            update_progress(run_data, deadline, cf_model._progress, 
+                            cf_model.ObjVal 
+                            if cf_model.status == GRB.OPTIMAL else None, 
+                            cf_model.ObjBound 
+                            if cf_model.status != GRB.INFEASIBLE else None)
+
+            # Deadline reached within the compact formulation
+            if cf_model.status in (GRB.TIME_LIMIT, GRB.INTERRUPTED):
+                run_data.time = "time limit"
+                return run_data
+
+            # Compact formulation is infeasible
+            if cf_model.status != GRB.OPTIMAL:
+                run_data.time = time() - start_time
+                return run_data
+
+            pool_vals, cf_sols = [], []
+            for n in range(cf_model.SolCount):
+                cf_model.setParam("SolutionNumber", n)
+                vals = cf_model.getAttr("Xn", x_vars)
+                pool_vals.append(vals)
+                cf_sols.append([key for key, val in zip(x_keys, vals) 
+                                for _ in range(int(round(val)))])
+            run_data.cf_solution = cf_sols[0]
+
+            # Look up cached outcomes and check the remaining subproblems 
+            # concurrently
+            sp_results = [sp_cache.get(cf_sol, run_data.REST_PERIODS) 
+                          for cf_sol in cf_sols]
+            missing = [idx for idx, result in enumerate(sp_results) 
+                       if result is None]
+            run_data.sp_cache_hits += len(sp_results) - len(missing)
+            run_data.sp_cache_misses += len(missing)
+            for idx, result in zip(missing, pool.map(
+                    check, [cf_sols[idx] for idx in missing])):
+                sp_results[idx] = result
+                if result[0] != 3:
+                    sp_cache.put(cf_sols[idx], run_data.REST_PERIODS, result)
+
+            # Deadline reached within a subproblem
+            if any(status == 3 for status, _ in sp_results):
+                run_data.time = "time limit"
+                return run_data
+
+            if first_solve:
+                bound_objective(cf_model, run_data, cf_model.objVal)
+                first_solve = False
+
+            for vals, (status, result) in zip(pool_vals, sp_results):
+                # Feasible solution found
+                if status == 1:
+                    num_sol += 1
+                    if num_sol >= run_data.COUNT_SOL:
+                        run_data.num_sol = num_sol
+                        run_data.schedule = result
+                        run_data.time = time() - start_time
+                        return run_data
+                    exclude_solution(cf_model, x_vars, vals)
+                # Subproblem infeasible
+                else:
+                    add_nogood(cf_model, x_vars, vals)
+
+            # Deadline reached
+            if deadline.expired():
+                run_data.time = "time limit"
+                return run_data
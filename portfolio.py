@@ -0,0 +1,156 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+from time import time
+
+from batch import error_record, solve_task
+from experiments import append_result, open_results, parse_variant
+
+# Configurations raced by default: options of run_algorithm, where params are
+# Gurobi parameters of the compact formulation
+configurations = {
+    "default": {},
+    "feasibility": {"params": {"MIPFocus": 1, "Seed": 1}},
+    "bound": {"params": {"MIPFocus": 2, "Cuts": 2, "Presolve": 2}},
+    "lazy": {"lazy_subproblem": True, "symmetry": True},
+}
+
+# Time granted to the workers beyond the time limit, e.g., for building
+grace_time = 30
+
+
+def race_worker(name, task, time_limit, threads, cache_dir, config, results):
+    """
+    Solve a task with one configuration and report its result record, or an
+    error record if the run failed.
+    """
+    try:
+        record = solve_task(task, time_limit, threads, cache_dir, **config)
+    except Exception as e:
+        record = error_record(task, e)
+    results.put((name, record))
+
+
+def conclusive(record):
+    """
+    Check whether a run found a schedule, which is optimal for the objective 
+    variants, or proved that none exists.
+    """
+    return not isinstance(record["time"], str)
+
+
+def run_portfolio(task, configs=None, time_limit=1000, threads=None, 
+                  cache_dir=None, log=None):
+    """
+    Race configurations of run_algorithm on an (instance, variant) task in 
+    parallel processes. The record of the first conclusive run is returned 
+    and the remaining processes are terminated. If no run is conclusive, the
+    first record of a run that did not fail is returned. The record contains 
+    the name of the winning configuration and, if log is given, the outcome 
+    of the race is appended to this file.
+    """
+    if configs is None:
+        configs = configurations
+    if threads is None:
+        threads = max(1, (os.cpu_count() or 1) // len(configs))
+
+    start_time = time()
+    results = multiprocessing.Queue()
+    processes = {
+        name: multiprocessing.Process(
+            target=race_worker, 
+            args=(name, task, time_limit, threads, cache_dir, config, results))
+        for name, config in configs.items()
+        }
+    for process in processes.values():
+        process.start()
+
+    winner, finished = None, {}
+    try:
+        while len(finished) < len(processes):
+            timeout = start_time + time_limit + grace_time - time()
+            try:
+                name, record = results.get(timeout=max(0, timeout))
+            except queue.Empty:
+                break
+            finished[name] = record
+            if conclusive(record):
+                winner = name
+                break
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+    if winner is None and finished:
+        winner = next((name for name, record in finished.items() 
+                       if record["time"] != "error"), next(iter(finished)))
+    record = finished.get(winner, {"time": "time limit"})
+    record["configuration"] = winner
+    record["conclusive"] = conclusive(record)
+    record["race_time"] = time() - start_time
+
+    if log is not None:
+        with open_results(log) as f:
+            append_result(f, {
+                "path": task[0], "variant": list(task[1:]), 
+                "winner": winner, "conclusive": record["conclusive"], 
+                "time": record["time"], "race_time": record["race_time"], 
+                "configurations": sorted(configs), 
+                "finished": {name: r["time"] for name, r in finished.items()},
+                })
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Race solver configurations on an RWSP instance.")
+    parser.add_argument("instance", help="problem instance file (*.dzn)")
+    parser.add_argument("--variant", default="BP", 
+                        help="problem variant, e.g., NE/RP")
+    parser.add_argument("--configurations", nargs="+", 
+                        choices=sorted(configurations), 
+                        default=sorted(configurations))
+    parser.add_argument("--time-limit", type=float, default=1000)
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--cache-dir", help="directory of the model cache")
+    parser.add_argument("--log", default="portfolio.jsonl", 
+                        help="file the winning configurations are logged to")
+    args = parser.parse_args(argv)
+
+    task = (args.instance,) + parse_variant(args.variant)
+    configs = {name: configurations[name] for name in args.configurations}
+    record = run_portfolio(task, configs, args.time_limit, args.threads, 
+                           args.cache_dir, args.log)
+    print("Winner: {} ({} s)".format(record["configuration"], record["time"]))
+    if record.get("schedule"):
+        print(record["schedule"])
+
+
+if __name__ == "__main__":
+    main()
@@ -23,42 +23,107 @@ SOFTWARE.
 """
 import re
 
+# Names of the shift types, the index corresponds to the shift type
+shift_names = "DANB"
+
+_token = re.compile(r"%[^\n]*|\[\||\|\]|[\[\]{}|,;=]|-?\w+")
+
+
+def tokenize(text):
+    """
+    Split MiniZinc data into tokens, skipping comments.
+    """
+    for match in _token.finditer(text):
+        token = match.group()
+        if token[0] != "%":
+            yield token
+
+
+def parse_value(tokens):
+    """
+    Parse a value of the MiniZinc data subset used by the problem instances:
+    integers, arrays, two-dimensional arrays and (arrays of) sets of integers.
+    """
+    token = next(tokens)
+    if token == "[|":
+        rows, row = [], []
+        for token in tokens:
+            if token == "|]":
+                break
+            elif token == "|":
+                rows.append(row)
+                row = []
+            elif token != ",":
+                row.append(int(token))
+        if row:
+            rows.append(row)
+        return rows
+    elif token == "[":
+        values = []
+        while True:
+            token = next(tokens)
+            if token == "]":
+                return values
+            elif token == "{":
+                values.append(parse_set(tokens))
+            elif token != ",":
+                values.append(int(token))
+    elif token == "{":
+        return parse_set(tokens)
+    return int(token)
+
+
+def parse_set(tokens):
+    values = []
+    for token in tokens:
+        if token == "}":
+            break
+        elif token != ",":
+            values.append(int(token))
+    return values
+
+
+def parse_dzn(text):
+    """
+    Parse the assignments of a MiniZinc data file in a single pass.
+    """
+    tokens = tokenize(text)
+    data = {}
+    for name in tokens:
+        if name == ";":
+            continue
+        if next(tokens) != "=":
+            raise ValueError("Expected assignment to {}".format(name))
+        data[name] = parse_value(tokens)
+    return data
+
 
 class Example:
-    def read_data(self, path):
-        print("Started reading: ", path)
+    def read_data(self, path, verbose=False):
+        if verbose:
+            print("Started reading: ", path)
         with open(path, "r") as f:
-            file = f.read()
-        self.num_employees = int(re.findall("groups = ([0-9]+);", file)[0])
-        self.num_shifts = int(re.findall("numShifts = ([0-9]);", file)[0])
-        self.temp_matrix = [[int(i) for i in re.findall(r"demand = \[[0-9\s,|]+\];", file, re.DOTALL)[0].replace("\n", ""
-                               ).replace("|", "").replace("[", "").replace("]", "").replace(" ", ""
-                               ).replace("demand=", "").replace(";","").strip().split(",")[e*7:(e+1)*7]] for e in range(self.num_shifts)]
-        if self.num_shifts == 2:
-            self.min_length_blocks = list(map(int, re.findall(r"minShift = \[([0-9]), ([0-9])\];", file)[0]))
-            self.max_length_blocks = list(map(int, re.findall(r"maxShift = \[([0-9]), ([0-9])\];", file)[0]))
-        elif self.num_shifts == 3:
-            self.min_length_blocks = list(map(int, re.findall(r"minShift = \[([0-9]), ([0-9]), ([0-9])\];", file)[0]))
-            self.max_length_blocks = list(map(int, re.findall(r"maxShift = \[([0-9]), ([0-9]), ([0-9])\];", file)[0]))
-        self.min_days_off = int(re.findall("minOff = ([0-9]);", file)[0])
-        self.max_days_off = int(re.findall("maxOff = ([0-9]);", file)[0])
-        self.min_length_work_blocks = int(re.findall("minOn = ([0-9]);", file)[0])
-        self.max_length_work_blocks = int(re.findall("maxOn = ([0-9]);", file)[0])
-        forbidden = [list(i.replace("{", "").replace("}", "").split(",")) for i in re.findall("{[0-9,]+}|{}", 
-                     re.findall(r"forbidden = \[(.+)\];", file)[0])]
-        for i in range(self.num_shifts):
-            if forbidden[i] == [""]:
-                forbidden[i] = []
-            else:
-                forbidden[i] = list(map(int, forbidden[i]))
-        if "forbidden3 = [|  |];" not in file:
-            forbidden3 = [[int(i) for i in re.findall(r"forbidden3 = \[[0-9\s,|]+\];", file, re.DOTALL)[0].replace("\n", ""
-                               ).replace("|", "").replace("[", "").replace("]", "").replace(" ", ""
-                               ).replace("forbidden3=", "").replace(";", "").strip().split(",")[e*3:(e+1)*3]] for e in range(len(re.findall(r"forbidden3 = \[[0-9\s,|]+\];", file, re.DOTALL)[0].split("\n")))]
-        else:
-            forbidden3 = []
+            self.read_string(f.read())
+
+    def read_string(self, text):
+        """
+        Read a problem instance from MiniZinc data.
+        """
+        data = parse_dzn(text)
         self.length_of_schedule = 7
-        Shifts = {1: 'D', 2: 'A', 3: 'N', 0: '-'}
+        self.num_employees = data["groups"]
+        self.num_shifts = data["numShifts"]
+        demand = [i for row in data["demand"] for i in row]
+        self.temp_matrix = [demand[e*7:(e+1)*7] for e in range(self.num_shifts)]
+        self.min_length_blocks = data["minShift"]
+        self.max_length_blocks = data["maxShift"]
+        self.min_days_off = data["minOff"]
+        self.max_days_off = data["maxOff"]
+        self.min_length_work_blocks = data["minOn"]
+        self.max_length_work_blocks = data["maxOn"]
+        forbidden = data["forbidden"]
+        forbidden3 = data.get("forbidden3", [])
+        Shifts = dict(enumerate("-" + shift_names))
         self.disallowed_shift_seq = []
         for idx, val in enumerate(forbidden):
             for disallowed in val:
@@ -68,16 +133,55 @@ class Example:
             self.disallowed_shift_seq.append(disallowed)
 
 
-def read_example(name):
-    data = Example()
-    data.read_data(name)
-    if data.num_shifts == 2:
-        Shifts = {'D': 0, 'A': 1}
-    elif data.num_shifts == 3:
-        Shifts = {'D': 0, 'A': 1, 'N': 2}
-    elif data.num_shifts == 4:
-        Shifts = {'D': 0, 'A': 1, 'N': 2, 'B': 3}
-        
+def generate_blocks(S, allowed, min_shift, max_shift, min_on, max_on, 
+                    max_runs=3):
+    """
+    Generate the work blocks consisting of up to max_runs runs of the same 
+    shift type. Runs are only extended by allowed transitions and within the
+    length bounds, such that no block is generated only to be discarded.
+    """
+    successors = {s: [s_ for s_ in S if (s, s_) in allowed] for s in S}
+    min_run = min(min_shift[s] for s in S)
+
+    def extend(block, runs):
+        for s in successors[block[-1]] if block else S:
+            # Leave room for the remaining runs
+            max_length = min(max_shift[s], 
+                             max_on - len(block) - (runs - 1) * min_run)
+            for length in range(min_shift[s], max_length + 1):
+                if runs > 1:
+                    yield from extend(block + (s,) * length, runs - 1)
+                elif len(block) + length >= min_on:
+                    yield block + (s,) * length
+
+    for runs in range(1, max_runs + 1):
+        yield from extend((), runs)
+
+
+def prune_blocks(blocks, demand, num_days):
+    """
+    Remove the work blocks that cannot be placed on any start day, as some of
+    their shifts would fall on a day without demand for the shift type. 
+    Returns the remaining blocks and the number of pruned blocks.
+    """
+    remaining = [
+        block for block in blocks 
+        if any(all(demand[s][(g + d) % num_days] > 0 
+                   for d, s in enumerate(block)) 
+               for g in range(num_days))
+        ]
+    return remaining, len(blocks) - len(remaining)
+
+
+def read_example(name, data=None):
+    """
+    Read a problem instance, unless its data has already been read.
+    """
+    if data is None:
+        data = Example()
+        data.read_data(name)
+    Shifts = {s: idx for idx, s in enumerate(shift_names[:data.num_shifts])}
+
     S = range(data.num_shifts)
     allowed = [(s, s_) for s in S for s_ in S if s != s_]
     forbidden = []
@@ -89,35 +193,9 @@ def read_example(name):
                 pass
         elif len(data.disallowed_shift_seq[li]) == 3:
             forbidden.append((Shifts[data.disallowed_shift_seq[li][0]], Shifts[data.disallowed_shift_seq[li][-1]]))
-    blocks = []
-    for s in S:
-        for w in range(max(data.min_length_blocks[s], data.min_length_work_blocks), min(data.max_length_blocks[s] + 1, data.max_length_work_blocks + 1)):
-            blocks.append((s,)*w)
-
-    for transition in allowed:
-        min_u, max_u = data.min_length_blocks[transition[0]], data.max_length_blocks[transition[0]]
-        min_v, max_v = data.min_length_blocks[transition[1]], data.max_length_blocks[transition[1]]
-        for u in range(min_u, max_u + 1):
-            for v in range(min_v, max_v + 1):
-                block = (transition[0],) * u + (transition[1],) * v
-                if len(block) >= data.min_length_work_blocks and len(block) <= data.max_length_work_blocks:
-                    blocks.append(block)
-
-    triples = set()
-    for t1 in allowed:
-        for t2 in allowed:
-            if t1[-1] == t2[0]:
-                triples.add((t1[0], t1[1], t2[1]))
-
-    for transition in triples:
-        min_u, max_u = data.min_length_blocks[transition[0]], data.max_length_blocks[transition[0]]
-        min_v, max_v = data.min_length_blocks[transition[1]], data.max_length_blocks[transition[1]]
-        min_w, max_w = data.min_length_blocks[transition[2]], data.max_length_blocks[transition[2]]
-        for u in range(min_u, max_u + 1):
-            for v in range(min_v, max_v + 1):
-                for w in range(min_w, max_w + 1):
-                    block = (transition[0],) * u + (transition[1],) * v + (transition[2],) * w
-                    if len(block) >= data.min_length_work_blocks and len(block) <= data.max_length_work_blocks:
-                        blocks.append(block)
+    blocks = list(generate_blocks(S, allowed, data.min_length_blocks, 
+                                  data.max_length_blocks, 
+                                  data.min_length_work_blocks, 
+                                  data.max_length_work_blocks))
 
     return data.length_of_schedule, data.num_employees, data.num_shifts, data.temp_matrix, blocks, forbidden, data.min_days_off, data.max_days_off
\ No newline at end of file
@@ -21,9 +21,12 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
-from types import SimpleNamespace
-from algorithm import run_algorithm
+import argparse
+import glob
 
+from batch import run_batch
+from experiments import (append_result, load_results, open_results, 
+                         parse_variant, pending_tasks, variant_name)
 
 '''
 Definition of the problem variants (see Section 4.2 of our paper)
@@ -47,24 +50,68 @@ problem_variants = [
 # Set of problem instances to be solved
 instances = ["ExampleProblemFile.dzn"] 
 
-# Define optimization tasks: Run each test instance for each problem variant
-optimization_tasks = [(instance, *param) 
-                      for instance in instances for param in problem_variants]
+# Number of parallel worker processes and time limit per task (in seconds)
+num_workers = 4
+time_limit = 1000
 
-# Run algorithm for all optimization tasks
-for task in optimization_tasks:
-    path, EMPLOYEE_OBJ, REST_PERIODS, WEEKEND_OBJ, COUNT_SOL = task
 
-    # Initialize run_data
-    run_data = SimpleNamespace(path=path, num_days=-1, num_sol=0, 
-                               time=0, schedule="", num_employees=-1,
-                               EMPLOYEE_OBJ=EMPLOYEE_OBJ, REST_PERIODS=REST_PERIODS,
-                               WEEKEND_OBJ=WEEKEND_OBJ, COUNT_SOL=COUNT_SOL)
-    print("-----------------   Instance {}   -----------------".format(*task))
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Solve each problem instance for each problem variant. "
+        "Finished tasks are appended to the results file, such that an "
+        "interrupted run resumes with the remaining tasks.")
+    parser.add_argument("instances", nargs="*", default=instances, 
+                        help="problem instance files or glob patterns")
+    parser.add_argument("--variants", nargs="+", 
+                        default=[variant_name(v) for v in problem_variants],
+                        help="problem variants, e.g., BP FW/RP NE/MS10")
+    parser.add_argument("--results", default="results.jsonl", 
+                        help="results file (JSON lines)")
+    parser.add_argument("--retry-time-limit", action="store_true", 
+                        help="solve tasks that reached the time limit again")
+    parser.add_argument("--retry-errors", action="store_true", 
+                        help="solve tasks that failed with an error again")
+    parser.add_argument("--workers", type=int, default=num_workers)
+    parser.add_argument("--time-limit", type=float, default=time_limit)
+    parser.add_argument("--cache-dir", help="directory of the model cache")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for pattern in args.instances:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            if path not in paths:
+                paths.append(path)
+    variants = [parse_variant(name) for name in args.variants]
+
+    # Define optimization tasks: Run each test instance for each problem 
+    # variant, skipping the tasks of previous runs
+    optimization_tasks = [(path, *variant) 
+                          for path in paths for variant in variants]
+    tasks = pending_tasks(optimization_tasks, load_results(args.results), 
+                          args.retry_time_limit, args.retry_errors)
+    print("{} of {} tasks already solved".format(
+        len(optimization_tasks) - len(tasks), len(optimization_tasks)))
 
-    # Call algorithm
-    result = run_algorithm(run_data)
-    if run_data.schedule:
-        print(run_data.schedule)
-    else:
-        print("Instance is INFEASIBLE")
+    with open_results(args.results) as f:
+        for record in run_batch(tasks, num_workers=args.workers, 
+                                time_limit=args.time_limit, 
+                                cache_dir=args.cache_dir):
+            append_result(f, record)
+            print("-----------------   Instance {}   -----------------".format(
+                record["path"]))
+            print("NE: {EMPLOYEE_OBJ}, RP: {REST_PERIODS}, FW: {WEEKEND_OBJ}, "
+                  "MS: {COUNT_SOL}".format(**record))
+            if record["schedule"]:
+                print(record["schedule"])
+            elif record["time"] == "error":
+                print("Task failed: {}".format(record["error"]))
+            elif record["time"] == "time limit":
+                print("Time limit reached, best bound: {}".format(
+                    record["bound"]))
+            else:
+                print("Instance is INFEASIBLE")
+
+
+# Run algorithm for all optimization tasks
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+
+class UnionFind:
+    """
+    Disjoint sets with path halving and union by size.
+    """
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, i):
+        parent = self.parent
+        if i not in parent:
+            parent[i] = i
+            self.size[i] = 1
+            return i
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        i, j = self.find(i), self.find(j)
+        if i == j:
+            return i
+        if self.size[i] < self.size[j]:
+            i, j = j, i
+        self.parent[j] = i
+        self.size[i] += self.size[j]
+        return i
+
+
+def connected_components(edges, nodes=()):
+    """
+    Compute the (weakly) connected components of a graph in near-linear time.
+    Returns a list of (nodes, edges) per component. Nodes without edges form 
+    components of their own.
+    """
+    uf = UnionFind()
+    for i in nodes:
+        uf.find(i)
+    for i, j in edges:
+        uf.union(i, j)
+
+    components = {}
+    for i in uf.parent:
+        components.setdefault(uf.find(i), ([], []))[0].append(i)
+    for i, j in edges:
+        components[uf.find(i)][1].append((i, j))
+
+    return list(components.values())
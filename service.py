@@ -0,0 +1,404 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import argparse
+import collections
+import hashlib
+import json
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from gurobipy import Env
+
+from algorithm import prepare_instance, run_algorithm
+from batch import init_run_data
+from instrumentation import Stats, run_record
+from reader import Example, parse_dzn
+
+# Options of a request that are passed on to run_algorithm
+solve_options = ("lazy_subproblem", "solution_pool", "sp_workers", "backend", 
+                 "symmetry")
+
+
+# Fields of the problem variant and their types
+variant_fields = {"EMPLOYEE_OBJ": bool, "REST_PERIODS": bool, 
+                  "WEEKEND_OBJ": bool, "COUNT_SOL": int, 
+                  "prune_demand": bool, "time_limit": (int, float)}
+
+
+class ServiceBusy(Exception):
+    """
+    Raised if a request exceeds the queue limit of the service.
+    """
+
+
+class InvalidRequest(ValueError):
+    """
+    Raised if a request is malformed or refers to an unknown instance.
+    """
+
+
+def validate_request(request):
+    """
+    Check the fields of a request before it is queued.
+    """
+    if not isinstance(request, dict):
+        raise InvalidRequest("Request must be a JSON object")
+    if "instance" not in request and "path" not in request:
+        raise InvalidRequest("Request without instance or path")
+    for field in ("instance", "path"):
+        if field in request and not isinstance(request[field], str):
+            raise InvalidRequest("{} must be a string".format(field))
+    for field, types in variant_fields.items():
+        if field not in request:
+            continue
+        value = request[field]
+        if types is bool:
+            valid = isinstance(value, bool)
+        else:
+            # bool is a subclass of int
+            valid = (isinstance(value, types) and not isinstance(value, bool) 
+                     and value >= 0)
+        if not valid:
+            raise InvalidRequest("Invalid value of {}: {!r}".format(
+                field, value))
+
+
+def error_status(error):
+    """
+    HTTP status of a failed request: 503 if the service is busy, 400 for
+    invalid requests and 500 for failures of the solver.
+    """
+    if isinstance(error, ServiceBusy):
+        return 503
+    if isinstance(error, InvalidRequest):
+        return 400
+    return 500
+
+
+def start_env(threads=0):
+    env = Env(empty=True)
+    env.setParam("OutputFlag", 0)
+    if threads:
+        env.setParam("Threads", threads)
+    env.start()
+    return env
+
+
+class EnvPool:
+    """
+    Pool of started Gurobi environments, each of which is used by one request 
+    at a time.
+    """
+    def __init__(self, size, threads=0):
+        self._envs = queue.Queue()
+        for _ in range(size):
+            self._envs.put(start_env(threads))
+
+    @contextmanager
+    def env(self):
+        env = self._envs.get()
+        try:
+            yield env
+        finally:
+            self._envs.put(env)
+
+    def close(self):
+        while not self._envs.empty():
+            self._envs.get().dispose()
+
+
+def dispose_instance(entry):
+    """
+    Dispose the base model and the environment of an instance entry.
+    """
+    if "env" in entry:
+        entry["instance"].cf_model.dispose()
+        entry["env"].dispose()
+
+
+class SolveService:
+    """
+    Solve requests with a pool of warm Gurobi environments. At most num_envs 
+    requests are solved concurrently and at most max_queue further requests 
+    wait, all other requests are rejected. The base models of the 
+    max_instances most recent instances are kept in memory, each in its own 
+    environment, and are shared by the requests for the instance. Evicted 
+    instances are disposed as soon as no request uses them anymore. All models
+    of a request, including the subproblems of the solution pool, are created
+    in the pooled environment of the request.
+
+    A request is a dictionary with the instance as MiniZinc data ("instance")
+    or as the path of an instance file relative to instance_dir ("path"), the
+    problem variant ("EMPLOYEE_OBJ", "REST_PERIODS", "WEEKEND_OBJ", 
+    "COUNT_SOL"), and optionally "id", "time_limit", "prune_demand" and the 
+    options of run_algorithm listed in solve_options. Requests by path are 
+    only accepted if instance_dir is given.
+    """
+    def __init__(self, num_envs=2, max_queue=16, max_instances=32, threads=1, 
+                 time_limit=60, instance_dir=None):
+        self.envs = EnvPool(num_envs, threads)
+        self.threads = threads
+        self.time_limit = time_limit
+        self.max_instances = max_instances
+        self.instance_dir = (os.path.realpath(instance_dir) 
+                             if instance_dir is not None else None)
+        self._instances = collections.OrderedDict()
+        self._instances_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(num_envs + max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=num_envs)
+
+    def read_instance(self, request):
+        """
+        Return the MiniZinc data of a request. Instance files can only be read
+        from instance_dir, requests by path are rejected if it is not set.
+        """
+        if "instance" in request:
+            return request["instance"]
+        if self.instance_dir is None:
+            raise InvalidRequest("Requests by path are disabled")
+        path = os.path.realpath(
+            os.path.join(self.instance_dir, request["path"]))
+        if os.path.commonpath([path, self.instance_dir]) != self.instance_dir:
+            raise InvalidRequest("Path outside of the instance directory")
+        try:
+            with open(path) as f:
+                return f.read()
+        except OSError as e:
+            raise InvalidRequest("Unknown instance {}".format(
+                request["path"])) from e
+
+    @contextmanager
+    def instance(self, request, stats):
+        """
+        Provide the prepared instance of a request, which is constructed on the
+        first request for the instance.
+        """
+        text = self.read_instance(request)
+        prune_demand = request.get("prune_demand", False)
+        try:
+            content = repr((sorted(parse_dzn(text).items()), prune_demand))
+        except ValueError as e:
+            raise InvalidRequest("Invalid instance: {}".format(e)) from e
+        key = hashlib.sha256(content.encode()).hexdigest()
+
+        with self._instances_lock:
+            entry = self._instances.get(key)
+            if entry is None:
+                entry = self._instances[key] = {
+                    "lock": threading.Lock(), "users": 0, "evicted": False}
+            entry["users"] += 1
+            self._instances.move_to_end(key)
+            while len(self._instances) > self.max_instances:
+                _, evicted = self._instances.popitem(last=False)
+                evicted["evicted"] = True
+                if not evicted["users"]:
+                    dispose_instance(evicted)
+
+        try:
+            # Concurrent requests for a new instance wait for its construction
+            with entry["lock"]:
+                if "instance" not in entry:
+                    data = Example()
+                    try:
+                        data.read_string(text)
+                    except (KeyError, IndexError, TypeError, ValueError) as e:
+                        raise InvalidRequest("Invalid instance: {}".format(
+                            e)) from e
+                    env = start_env(self.threads)
+                    try:
+                        entry["instance"] = prepare_instance(
+                            request.get("path", key), data=data, 
+                            prune_demand=prune_demand, stats=stats, env=env)
+                    except BaseException:
+                        env.dispose()
+                        raise
+                    entry["env"] = env
+                else:
+                    stats.count("instance_reused")
+            yield entry["instance"]
+        finally:
+            # The last request for an evicted instance disposes it
+            with self._instances_lock:
+                entry["users"] -= 1
+                if entry["evicted"] and not entry["users"]:
+                    dispose_instance(entry)
+
+    def solve(self, request):
+        """
+        Solve a request and return its result record.
+        """
+        run_data = init_run_data(
+            request.get("path", "request"), 
+            request.get("EMPLOYEE_OBJ", False), 
+            request.get("REST_PERIODS", False), 
+            request.get("WEEKEND_OBJ", False), request.get("COUNT_SOL", 0))
+        run_data.stats = Stats()
+        time_limit = min(request.get("time_limit", self.time_limit), 
+                         self.time_limit)
+        options = {key: request[key] for key in solve_options 
+                   if key in request}
+        with self.envs.env() as env, \
+                self.instance(request, run_data.stats) as instance:
+            run_algorithm(run_data, time_limit=time_limit, 
+                          threads=self.threads, instance=instance, env=env,
+                          **options)
+        record = run_record(run_data)
+        record["id"] = request.get("id")
+        return record
+
+    def submit(self, request):
+        """
+        Queue a request and return a future of its result record. Raises 
+        InvalidRequest if its fields are invalid and ServiceBusy if the queue 
+        is full.
+        """
+        validate_request(request)
+        if not self._slots.acquire(blocking=False):
+            raise ServiceBusy("Too many pending requests")
+        future = self._executor.submit(self.solve, request)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def close(self):
+        self._executor.shutdown()
+        self.envs.close()
+        with self._instances_lock:
+            while self._instances:
+                dispose_instance(self._instances.popitem()[1])
+
+
+def error_record(request_id, error):
+    return {"id": request_id, "error": "{}: {}".format(
+        type(error).__name__, error)}
+
+
+def serve_stdio(service, stdin=sys.stdin, stdout=sys.stdout):
+    """
+    Read one JSON request per line and write one JSON result per line in the
+    order in which the requests finish.
+    """
+    output_lock = threading.Lock()
+
+    def write(record):
+        with output_lock:
+            stdout.write(json.dumps(record) + "\n")
+            stdout.flush()
+
+    def done(request_id, future):
+        try:
+            write(future.result())
+        except Exception as e:
+            write(error_record(request_id, e))
+
+    futures = []
+    for line in stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            future = service.submit(request)
+        except Exception as e:
+            write(error_record(None, e))
+            continue
+        future.add_done_callback(
+            lambda f, request_id=request.get("id"): done(request_id, f))
+        futures.append(future)
+    for future in futures:
+        future.exception()
+
+
+def serve_http(service, host="127.0.0.1", port=8000):
+    """
+    Accept requests by POST /solve on localhost, replying with the result 
+    record, or with an error record and the status of error_status.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, code, record):
+            body = json.dumps(record).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path != "/solve":
+                return self.reply(404, {"error": "Unknown path"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length))
+            except ValueError as e:
+                return self.reply(400, error_record(None, e))
+            try:
+                record = service.submit(request).result()
+            except Exception as e:
+                return self.reply(error_status(e), error_record(None, e))
+            self.reply(200, record)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve RWSP solve requests with warm Gurobi environments.")
+    parser.add_argument("--http", type=int, metavar="PORT", 
+                        help="serve HTTP on localhost instead of stdin/stdout")
+    parser.add_argument("--envs", type=int, default=2, 
+                        help="number of concurrently solved requests")
+    parser.add_argument("--max-queue", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=1, 
+                        help="Gurobi threads per request")
+    parser.add_argument("--time-limit", type=float, default=60, 
+                        help="maximum time limit per request (in seconds)")
+    parser.add_argument("--instance-dir", 
+                        help="directory of the instances that can be "
+                        "requested by path (disabled by default)")
+    args = parser.parse_args(argv)
+
+    service = SolveService(args.envs, args.max_queue, threads=args.threads, 
+                           time_limit=args.time_limit, 
+                           instance_dir=args.instance_dir)
+    try:
+        if args.http:
+            serve_http(service, port=args.http)
+        else:
+            serve_stdio(service)
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import collections
+from types import SimpleNamespace
+from gurobipy import quicksum
+
+from algorithm import build_variant, prepare_instance, solve_variant
+from compact_formulation import (arc_bounds, construct_compact_formulation, 
+                                 presolve_stints)
+from extensions.num_employees import update_employee_bounds
+from instrumentation import Stats
+from symmetry import add_symmetry_breaking, symmetry_shifts
+
+
+class Session:
+    """
+    What-if session on a problem variant of an instance, e.g., for sweeps over
+    demand or staffing scenarios. The compact formulation is built once, and
+    changes are applied in place by updating the right-hand sides of 
+    constraints (1) and (2) and the upper bounds on the stints. The model is 
+    only rebuilt if the demand requires stints that were fixed to zero when 
+    it was built.
+
+    Each solve starts from the last compact formulation solution. The 
+    subproblem outcomes are kept across solves. Constraints (12), including 
+    the lazy ones, are only kept while the scenario is unchanged: a no-good 
+    cuts off all solutions that contain the support of an infeasible solution,
+    which may be feasible after the demand or the number of employees has 
+    changed. The options are those of run_algorithm.
+    """
+    def __init__(self, run_data, threads=0, lazy_subproblem=False, 
+                 solution_pool=True, sp_workers=4, backend="gurobi", env=None, 
+                 symmetry=False, cache=None):
+        self.variant = run_data
+        self.symmetry = symmetry
+        self.env = env
+        self.options = dict(threads=threads, lazy_subproblem=lazy_subproblem, 
+                            solution_pool=solution_pool, sp_workers=sp_workers,
+                            backend=backend, env=env)
+        self.stats = Stats()
+        self.instance = prepare_instance(run_data.path, cache, 
+                                         stats=self.stats, env=env)
+        # Work on a copy, such that the demand of the instance data is kept
+        self.instance.demand = [list(row) for row in self.instance.demand]
+        self.start = collections.Counter()
+        self._build()
+
+    def _build(self):
+        run_data = SimpleNamespace(**vars(self.variant))
+        run_data.stats = self.stats
+        self.cf_model = build_variant(run_data, self.instance, self.env, 
+                                      self.symmetry)
+        self.cf_model.update()
+        # Stints fixed to zero by the extensions, e.g., the rest periods
+        self.fixed = {key for key, var in self.cf_model._x.items() 
+                      if var.UB == 0}
+
+    def _rebuild(self):
+        """
+        Rebuild the base model and the model of the variant for the current
+        demand.
+        """
+        instance = self.instance
+        with self.stats.phase("build"):
+            instance.cf_model = construct_compact_formulation(
+                instance.num_employees, instance.num_days, 
+                instance.num_shifts, instance.min_off, instance.max_off, 
+                instance.demand, instance.B, instance.H, instance.forbidden, 
+                self.env, instance.stints)
+        self._build()
+
+    def _add_nogoods(self, nogoods):
+        """
+        Add constraints (12) for the supports of lazy no-goods of the current
+        scenario.
+        """
+        x = self.cf_model._x
+        for support in nogoods:
+            self.cf_model._nogoods.append(self.cf_model.addConstr(
+                quicksum(x[key] for key, _ in support) 
+                <= sum(int(round(val)) for _, val in support) - 1
+                ))
+
+    def _drop_nogoods(self):
+        """
+        Remove the constraints (12) of the previous scenario.
+        """
+        self.cf_model.remove(self.cf_model._nogoods)
+        self.cf_model._nogoods = []
+        self.cf_model._lazy_nogoods = []
+
+    def update(self, demand=None, num_employees=None):
+        """
+        Change the demand, given as a dictionary {(shift, day): demand}, 
+        and/or the number of employees. With the employee objective, the 
+        number of employees is not constrained and only reported.
+        """
+        instance, cf_model = self.instance, self.cf_model
+        if demand or num_employees is not None:
+            self._drop_nogoods()
+        if num_employees is not None:
+            instance.num_employees = num_employees
+            # Constraint (2) is replaced by the employee objective
+            if not self.variant.EMPLOYEE_OBJ:
+                cf_model._ctr_num_employees.RHS = num_employees
+        if not demand:
+            return
+
+        for (s, g), value in demand.items():
+            instance.demand[s][g] = value
+        keys, ub = presolve_stints(instance.num_days, instance.demand, 
+                                   instance.B, instance.H, instance.forbidden)
+        x = cf_model._x
+        if any(key not in x for key in keys):
+            self._rebuild()
+            return
+
+        keys = set(keys)
+        x_ub = {key: (ub[key[0], key[1]] 
+                      if key in keys and key not in self.fixed else 0) 
+                for key in x.keys()}
+        for key, var in x.items():
+            var.UB = x_ub[key]
+        v_ub = arc_bounds(instance.num_days, instance.B, instance.H, x_ub)
+        for key, var in cf_model._v.items():
+            var.UB = v_ub[key]
+        for (g, s), constr in cf_model._ctr_demand.items():
+            constr.RHS = instance.demand[s][g]
+        for (g, b), constr in cf_model._ctr_ub.items():
+            constr.RHS = ub[g, b]
+        if self.variant.EMPLOYEE_OBJ:
+            update_employee_bounds(cf_model, instance.demand, 
+                                   instance.num_days, 
+                                   self.variant.REST_PERIODS)
+        # The rotations that preserve the demand may have changed
+        if cf_model._symmetry_breaking is not None:
+            cf_model.remove(cf_model._symmetry_breaking)
+            cf_model._symmetry_breaking = add_symmetry_breaking(
+                cf_model, symmetry_shifts(instance.demand, instance.num_days, 
+                                          self.variant))
+
+    def solve(self, time_limit=1000, progress=None):
+        """
+        Solve the current scenario and return its run_data (see 
+        run_algorithm).
+        """
+        instance, cf_model = self.instance, self.cf_model
+        run_data = SimpleNamespace(**vars(self.variant))
+        run_data.stats = Stats()
+        run_data.num_employees = instance.num_employees
+        run_data.num_days = instance.num_days
+        run_data.num_pruned_blocks = instance.num_pruned_blocks
+
+        # Exclusions and objective bounds only apply to the previous search
+        cf_model.remove(cf_model._temporary)
+        cf_model._temporary = []
+        cf_model._indicators = {}
+        if self.start:
+            for key, var in cf_model._x.items():
+                var.Start = self.start[key]
+
+        solve_variant(cf_model, run_data, instance, time_limit, 
+                      progress=progress, **self.options)
+
+        if run_data.cf_solution:
+            self.start = collections.Counter(run_data.cf_solution)
+        # Lazy constraints are discarded after the solve
+        lazy_nogoods, cf_model._lazy_nogoods = cf_model._lazy_nogoods, []
+        self._add_nogoods(lazy_nogoods)
+        return run_data
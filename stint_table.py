@@ -0,0 +1,142 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import numpy as np
+
+from reader import shift_names
+
+# Entries of the day sequences of the stints besides the shift types
+OFF = -1
+NONE = -2
+
+# Bitmask of the days of a week and number of days in each weekly bitmask
+WEEK = (1 << 7) - 1
+_popcount = np.array([bin(mask).count("1") for mask in range(WEEK + 1)])
+
+
+def week_days(mask, week):
+    """
+    Return the number of days of week week contained in a bitmask (see 
+    StintTable), for integers as well as NumPy arrays.
+    """
+    return _popcount[(mask >> (7 * week)) & WEEK]
+
+
+def violates_rest_period(start, length, off_mask, next_length, next_off_mask):
+    """
+    Check whether a stint starting on day start, followed by the next stint, 
+    has less than two days off in the first week that starts after the start 
+    day and is contained in both stints. The arguments are integers or NumPy 
+    arrays of the lengths and bitmasks of days off of both stints.
+    """
+    offset = start % 7
+    # Days off of both stints relative to the week of the start day
+    off_mask = off_mask | (next_off_mask << (7 * ((offset + length) // 7)))
+    return (offset + length + next_length > 14) & (week_days(off_mask, 1) < 2)
+
+
+class StintTable:
+    """
+    Attributes of all stints (g,b,h) of an instance, computed once with NumPy.
+    Each attribute is an array of shape (num_days, len(B), len(H)) indexed by
+    (g,b,h):
+
+    block_len, days_off, length  number of working days, days off and days
+    end                          start day of the next stint
+    last_day                     last working day
+    num_cycles                   number of planning cycles of the stint
+    free_weekends                number of free weekends within the stint
+    first_shift, last_shift      first and last shift type of the block
+    work_mask, off_mask          worked days and days off as bitmasks, where 
+                                 bit g % 7 + t is day t of the stint, i.e., 
+                                 bits 7w..7w+6 are the days of week w
+
+    min_days_off is the number of days off H[0], the minimum of an instance.
+    """
+    def __init__(self, num_days, B, H):
+        num_blocks, num_h = len(B), len(H)
+        self.num_days = num_days
+        self.shape = (num_days, num_blocks, num_h)
+        self.min_days_off = H[0]
+        g = np.arange(num_days)[:, None, None]
+        block_len = np.array([len(B[b]) for b in range(num_blocks)])
+        days_off = np.array([H[h] for h in range(num_h)])
+
+        self.block_len = np.broadcast_to(block_len[None, :, None], self.shape)
+        self.days_off = np.broadcast_to(days_off[None, None, :], self.shape)
+        self.length = self.block_len + self.days_off
+        self.end = (g + self.length) % num_days
+        self.last_day = (g + self.block_len - 1) % num_days
+        # Day 0 of each week that the stint starts on or passes through
+        self.num_cycles = (g + self.length - 1) // num_days + (g == 0)
+        self.first_shift = np.broadcast_to(
+            np.array([B[b][0][1] for b in range(num_blocks)])[None, :, None], 
+            self.shape)
+        self.last_shift = np.broadcast_to(
+            np.array([B[b][-1][1] for b in range(num_blocks)])[None, :, None], 
+            self.shape)
+
+        # Day sequences of the (b,h), padded by two days beyond the longest 
+        # stint
+        t = np.arange(int(self.length.max()) + 2)
+        shifts = np.full((num_blocks, len(t)), NONE)
+        for b in range(num_blocks):
+            shifts[b, :len(B[b])] = [s for _, s in B[b]]
+        L = block_len[:, None, None]
+        seq = np.where(t < L, shifts[:, None, :], 
+                       np.where(t < L + days_off[None, :, None], OFF, NONE))
+
+        # Friday without a night shift, followed by a day off on Saturday and 
+        # Sunday
+        span = len(t) - 2
+        free = ((seq[:, :, :span] != 2) & (seq[:, :, :span] != NONE) 
+                & (seq[:, :, 1:span+1] == OFF) & (seq[:, :, 2:] == OFF))
+        friday = (np.arange(num_days)[:, None] + t[:span]) % 7 == 4
+        self.free_weekends = np.einsum("gt,bht->gbh", friday.astype(int), 
+                                       free.astype(int))
+
+        bits = np.left_shift(1, t, dtype=np.int64)
+        offset = (g % 7).astype(np.int64)
+        self.work_mask = ((seq >= 0) * bits).sum(axis=2)[None] << offset
+        self.off_mask = ((seq == OFF) * bits).sum(axis=2)[None] << offset
+
+        self._blocks = ["".join(shift_names[s] for _, s in B[b]) 
+                        for b in range(num_blocks)]
+        self._days_off = ["-" * H[h] for h in range(num_h)]
+
+    def lookup(self, attr, keys):
+        """
+        Return the values of an attribute for the stints keys as a dictionary
+        of Python integers.
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = getattr(self, attr)[tuple(np.array(keys).T)].tolist()
+        return dict(zip(keys, values))
+
+    def string_rep(self, b, h):
+        """
+        Return the schedule of a stint, e.g., "DDAA--".
+        """
+        return self._blocks[b] + self._days_off[h]
@@ -22,110 +22,202 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 from gurobipy import Model, quicksum, GRB, tuplelist
-import itertools
+from circuit_search import search_circuit
+from separation import connected_components
+from instrumentation import Stats
+from stint_table import StintTable, violates_rest_period
 import collections
-shifts = {0: 'D', 1: 'A', 2: 'N', 3: 'B'}
+import numpy as np
 Node = collections.namedtuple("Node", "start end fwork "
-                              "lwork nwork do string_rep mp_id")   
+                              "lwork nwork do string_rep mp_id off_mask")   
 
 
-def subproblem(x, blocks, H, forbidden, num_days, REST_PERIODS):
+def construct_nodes(x, blocks, H, num_days, stints=None):
     """
-    Construct and solve subproblem formulation
+    Construct a node for each stint of the compact formulation solution, 
+    reading the attributes of the stints from the stint table stints
     """
-    def subtour(edges):
-        n = len(Nodes)
-        uv = list(range(n))
-        shortest_cycle = range(n+1)
-        while uv:
-            curr_cycle = []
-            neighbors = uv
-            while neighbors:
-                curr_node = neighbors[0]
-                curr_cycle.append(curr_node)
-                uv.remove(curr_node)
-                neighbors = [j for i, j in edges.select(curr_node, '*') 
-                             if j in uv]
-            if len(curr_cycle) < len(shortest_cycle):
-                shortest_cycle = curr_cycle
-        return shortest_cycle
+    if stints is None:
+        stints = StintTable(num_days, blocks, H)
+    if not x:
+        return {}
+    idx = tuple(zip(*x))
+    attributes = zip(*(getattr(stints, attr)[idx].tolist() 
+                       for attr in ("end", "first_shift", "last_shift", 
+                                    "block_len", "days_off", "off_mask")))
 
+    Nodes = {}
+    for i, ((day, block, daysoff), (end, fwork, lwork, nwork, do, off)) in (
+            enumerate(zip(x, attributes))):
+        Nodes[i] = Node(day, end, fwork, lwork, nwork, do, 
+                        stints.string_rep(block, daysoff), 
+                        (day, block, daysoff), off)
+    return Nodes
+
+
+def feasible_arc(n1, n2, forbidden, REST_PERIODS):
+    """
+    Check whether stint n2 may directly follow stint n1
+    """
+    if n1.end != n2.start:
+        return False
+    if n1.do == 1 and n2.fwork in forbidden.get(n1.lwork, ()):
+        return False
+    if REST_PERIODS and violates_rest_period(
+            n1.start, n1.nwork + n1.do, n1.off_mask, n2.nwork + n2.do, 
+            n2.off_mask):
+        return False
+    return True
+
+
+def construct_arcs(Nodes, forbidden, REST_PERIODS):
+    """
+    Construct the feasible arcs between stints. Only stints that start on the
+    day after the previous stint ends are considered as successors. The rest
+    periods are checked for all these arcs at once.
+    """
+    by_start = collections.defaultdict(list)
+    for i, n in Nodes.items():
+        by_start[n.start].append(i)
+
+    arcs = [(i1, i2) for i1, n1 in Nodes.items() 
+            for i2 in by_start[n1.end] 
+            if i1 != i2 and feasible_arc(n1, Nodes[i2], forbidden, False)]
+    if REST_PERIODS and arcs:
+        start, length, off_mask = (np.array(values) for values in zip(*(
+            (n.start, n.nwork + n.do, n.off_mask) for n in Nodes.values())))
+        first, second = (np.array(nodes) for nodes in zip(*arcs))
+        violated = violates_rest_period(start[first], length[first], 
+                                        off_mask[first], length[second], 
+                                        off_mask[second])
+        arcs = [arc for arc, v in zip(arcs, violated.tolist()) if not v]
+    return tuplelist(arcs)
+
+
+def schedule_string(Nodes, tour):
+    """
+    Concatenate the stints of a tour to a schedule starting on the first day
+    """
+    str_sol = "".join(Nodes[i].string_rep for i in tour)
+    prepend_from_end = Nodes[tour[0]].start
+    end = str_sol[-prepend_from_end:]
+    return end + str_sol[:-prepend_from_end]
+
+
+def solve_formulation(Nodes, arcs, threads=0, env=None, stats=None, 
+                      deadline=None):
+    """
+    Construct and solve the subproblem formulation with Gurobi. Returns the 
+    tour of stints, or None if the subproblem is infeasible. Raises 
+    TimeoutError if the deadline is reached.
+    """
     def subtourelim(model, where):
         if where == GRB.Callback.MIPSOL:
             n = len(Nodes)
             vals = model.cbGetSolution(model._vars)
-            sol_edges = tuplelist((i, j) for i, j in model._vars.keys() 
-                                 if vals[i, j] > 0.5)
-            tour = subtour(sol_edges)
-            if len(tour) < n:
-                # Constraints (9)
-                model.cbLazy(
-                    quicksum(model._vars[i, j]
-                             for i, j in itertools.permutations(tour, 2))
-                    <= len(tour)-1
-                    )
-    Nodes = {}
-    for idx, (day, block, daysoff) in enumerate(x):
-        end = (day + len(blocks[block]) + H[daysoff]) % num_days
-        fwork, lwork = blocks[block][0][1], blocks[block][-1][1]
-        string_rep = ("".join(shifts[i[1]] for i in blocks[block]) 
-                      + "".join("-" for _ in range(H[daysoff])))
-        Nodes[idx] = Node(day, end, fwork, lwork, len(blocks[block]), 
-                          H[daysoff], string_rep, (day, block, daysoff))
-
-    infeas = []
-    for i1 in Nodes:
-        for i2 in Nodes:
-            n1, n2 = Nodes[i1], Nodes[i2]
-            if n1.end != n2.start:
-                infeas.append((i1, i2))
-            elif n1.do == 1 and n2.fwork in forbidden[n1.lwork]:
-                infeas.append((i1, i2))
-            elif REST_PERIODS:
-                combined = n1.string_rep + n2.string_rep
-                # Offset until next week starts
-                idx_offset = 7 - (n1.start % 7)
-                # Is a whole week contained in the sequence?
-                if len(combined) > idx_offset + 7:
-                    if sum(1 for i in combined[idx_offset:idx_offset+7] 
-                           if i == "-") < 2:
-                        infeas.append((i1, i2))
-
-    m = Model()
+            sol_edges = [(i, j) for i, j in model._vars.keys() 
+                         if vals[i, j] > 0.5]
+            subtours = connected_components(sol_edges)
+            if len(subtours) > 1:
+                for tour, _ in subtours:
+                    if len(tour) < n:
+                        # Constraints (9)
+                        in_tour = set(tour)
+                        model.cbLazy(
+                            quicksum(model._vars[i, j] for i in tour 
+                                     for _, j in arcs.select(i, '*') 
+                                     if j in in_tour)
+                            <= len(tour)-1
+                            )
+                        stats.count("lazy_cuts_9")
+
+    if stats is None:
+        stats = Stats()
+
+    m = Model(env=env)
     m.setParam("OutputFlag", 0)
-    vars = m.addVars(Nodes, Nodes, vtype=GRB.BINARY)
+    if threads:
+        m.setParam("Threads", threads)
+    if deadline is not None:
+        m.setParam("TimeLimit", deadline.remaining())
+    # Variables only for feasible arcs, which implies constraints (10)
+    vars = m.addVars(arcs, vtype=GRB.BINARY)
 
     # Constraints (7)
-    m.addConstrs(
-        quicksum(vars[i, j] for j in Nodes) == 1 for i in Nodes
-    )
+    m.addConstrs(vars.sum(i, '*') == 1 for i in Nodes)
 
     # Constraints (8)
-    m.addConstrs(
-        quicksum(vars[i, j] for i in Nodes) == 1 for j in Nodes
-    )
-
-    # Constraints (10)
-    m.addConstrs(vars[i, i] == 0 for i in Nodes)
-
-    # Eliminate infeasible arcs
-    m.addConstrs(vars[i, j] == 0 for i, j in infeas)
+    m.addConstrs(vars.sum('*', j) == 1 for j in Nodes)
 
     m._vars = vars
     m.Params.lazyConstraints = 1
 
     try:
-        m.optimize(subtourelim)
+        with stats.phase("sp_solve"):
+            m.optimize(subtourelim)
+        if m.Status == GRB.TIME_LIMIT:
+            raise TimeoutError("Deadline reached in the subproblem")
         vals = m.getAttr('x', vars)
-        selected = tuplelist((i, j) 
-                             for i, j in vals.keys() if vals[i, j] > 0.5)
-
-        tour = subtour(selected)
-        # print(tour)
-        str_sol = "".join(Nodes[i].string_rep for i in tour)
-        prepend_from_end = Nodes[tour[0]].start
-        end = str_sol[-prepend_from_end:]
-        str_sol = end + str_sol[:-prepend_from_end]
-        return 1, str_sol
+        succ = {i: j for i, j in vals.keys() if vals[i, j] > 0.5}
+
+        # Follow the successors to obtain the tour
+        tour = [0]
+        while len(tour) < len(Nodes):
+            tour.append(succ[tour[-1]])
+        return tour
+    except TimeoutError:
+        raise
     except:
+        return None
+
+
+def subproblem(x, blocks, H, forbidden, num_days, REST_PERIODS, threads=0, 
+               search_budget=100000, env=None, stats=None, backend=None, 
+               deadline=None, stints=None):
+    """
+    Construct and solve subproblem formulation. The combinatorial search is 
+    tried first, the formulation is only solved if its budget is exhausted.
+    The formulation is solved by the given solver backend (see backends.py), 
+    by default with Gurobi. Timings and counters are recorded in stats. The
+    attributes of the stints are read from the stint table stints of the 
+    instance, which is computed unless it is given.
+
+    Returns status 1 and the schedule if the subproblem is feasible, status 2
+    if it is infeasible, and status 3 if the deadline is reached.
+    """
+    if stats is None:
+        stats = Stats()
+
+    with stats.phase("sp_build"):
+        Nodes = construct_nodes(x, blocks, H, num_days, stints)
+        arcs = construct_arcs(Nodes, forbidden, REST_PERIODS)
+    stats.count("sp_nodes", len(Nodes))
+    stats.count("sp_arcs", len(arcs))
+
+    # Every stint requires a feasible predecessor and successor
+    if (len({i for i, _ in arcs}) < len(Nodes) 
+            or len({j for _, j in arcs}) < len(Nodes)):
+        return 2, None
+
+    if search_budget:
+        with stats.phase("sp_search"):
+            tour = search_circuit(Nodes, arcs, search_budget, deadline)
+        if tour:
+            return 1, schedule_string(Nodes, tour)
+        elif tour is not None:
+            return 2, None
+        elif deadline is not None and deadline.expired():
+            return 3, None
+
+    try:
+        if backend is None:
+            tour = solve_formulation(Nodes, arcs, threads, env, stats, 
+                                     deadline)
+        else:
+            tour = backend.solve_circuit(Nodes, arcs, threads, env, stats, 
+                                         deadline)
+    except TimeoutError:
+        return 3, None
+    if tour is None:
         return 2, None
+    return 1, schedule_string(Nodes, tour)
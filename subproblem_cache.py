@@ -0,0 +1,99 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import collections
+import threading
+
+
+def rotate(schedule, days):
+    """
+    Rotate a schedule such that every stint starts the given number of days 
+    later.
+    """
+    days %= len(schedule)
+    if days == 0:
+        return schedule
+    return schedule[-days:] + schedule[:-days]
+
+
+class SubproblemCache:
+    """
+    LRU cache of subproblem results. Feasibility of the subproblem only depends
+    on the multiset of (g,b,h) stints and whether rest periods are considered.
+    Shifting all stints by the same number of days preserves feasibility, as 
+    long as the weekly rest periods are not affected. Results are therefore 
+    stored for a canonical rotation of each multiset. The cache may be shared 
+    between threads.
+    """
+    def __init__(self, num_days, maxsize=10000):
+        self.num_days = num_days
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def canonical(self, x, REST_PERIODS):
+        """
+        Return the canonical key of a multiset of stints and the number of days
+        by which the stints are shifted to obtain it.
+        """
+        # Rest periods are bound to weeks, all other rules to single days
+        step = 7 if REST_PERIODS else 1
+        best_key, best_shift = None, 0
+        for shift in range(0, self.num_days, step):
+            key = tuple(sorted(((g + shift) % self.num_days, b, h) 
+                               for g, b, h in x))
+            if best_key is None or key < best_key:
+                best_key, best_shift = key, shift
+        return (REST_PERIODS, best_key), best_shift
+
+    def get(self, x, REST_PERIODS):
+        """
+        Return the cached subproblem result for x, or None on a cache miss.
+        """
+        key, shift = self.canonical(x, REST_PERIODS)
+        with self._lock:
+            if key not in self._results:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._results.move_to_end(key)
+            status, schedule = self._results[key]
+        if schedule is not None:
+            schedule = rotate(schedule, -shift)
+        return status, schedule
+
+    def put(self, x, REST_PERIODS, result):
+        """
+        Store the subproblem result for x.
+        """
+        key, shift = self.canonical(x, REST_PERIODS)
+        status, schedule = result
+        if schedule is not None:
+            schedule = rotate(schedule, shift)
+        with self._lock:
+            self._results[key] = (status, schedule)
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
@@ -0,0 +1,84 @@
+"""
+MIT License
+
+Copyright (c) 2022 Tristan Becker
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+from gurobipy import quicksum
+
+
+def subproblem_shifts(num_days, REST_PERIODS):
+    """
+    Shifts (in days) of all stints that preserve the feasibility of the 
+    subproblem. Rest periods are bound to weeks, all other rules to days.
+    """
+    return range(0, num_days, 7 if REST_PERIODS else 1)
+
+
+def symmetry_shifts(demand, num_days, run_data):
+    """
+    Shifts (in days) of all stints that map solutions of the compact 
+    formulation of a problem variant to solutions, i.e., the rotations under 
+    which the demand is invariant. Rest periods and free weekends depend on 
+    the weekdays, such that these variants are not symmetric.
+    """
+    if run_data.REST_PERIODS or run_data.WEEKEND_OBJ:
+        return [0]
+    return [k for k in range(num_days) 
+            if all(row[(d + k) % num_days] == row[d] 
+                   for row in demand for d in range(num_days))]
+
+
+def add_symmetry_breaking(cf_model, shifts):
+    """
+    Break the rotation symmetry of the compact formulation. Any solution can be
+    rotated by one of the shifts, such that no other day of the orbit of day 0
+    has more starting stints than day 0. Returns the constraints.
+    """
+    x = cf_model._x
+    starts = {k: quicksum(x.select(k, None, None)) for k in shifts}
+    return cf_model.addConstrs(starts[0] >= starts[k] for k in shifts if k)
+
+
+def rotations(x, vals, shifts):
+    """
+    Return the values of the compact formulation solution vals (ordered as 
+    x.values()) rotated by each of the shifts. Duplicates and rotations to 
+    stints without variables, which cannot be part of any solution, are 
+    omitted.
+    """
+    keys = list(x.keys())
+    index = {key: idx for idx, key in enumerate(keys)}
+    num_days = x.shape[0]
+    support = [(key, val) for key, val in zip(keys, vals) if val > 0.1]
+
+    result, seen = [], set()
+    for k in shifts:
+        rotated = [0] * len(keys)
+        for (g, b, h), val in support:
+            idx = index.get(((g + k) % num_days, b, h))
+            if idx is None:
+                break
+            rotated[idx] = val
+        else:
+            if tuple(rotated) not in seen:
+                seen.add(tuple(rotated))
+                result.append(rotated)
+    return result
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The modules of the repository are imported from its top-level directory
+sys.path.insert(0, ROOT)
+
+from instance_generator import format_dzn, generate_instance  # noqa: E402
+
+
+@pytest.fixture
+def example_path():
+    """Path of the example instance (12 employees, 3 shift types)."""
+    return os.path.join(ROOT, "ExampleProblemFile.dzn")
+
+
+@pytest.fixture
+def make_instance(tmp_path):
+    """Write a generated instance to tmp_path and return its path."""
+    def make(num_employees=6, num_shifts=2, seed=0, name="instance.dzn", 
+             **kwargs):
+        path = tmp_path / name
+        path.write_text(format_dzn(generate_instance(
+            num_employees, num_shifts=num_shifts, seed=seed, **kwargs)))
+        return str(path)
+    return make
+
+
+@pytest.fixture
+def instance_path(make_instance):
+    """Path of a small generated instance (6 employees, 2 shift types)."""
+    return make_instance()
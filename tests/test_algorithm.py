@@ -0,0 +1,30 @@
+import pytest
+
+from algorithm import prepare_instance, run_algorithm
+from batch import init_run_data
+
+VARIANTS = [(False, False, False, 0), (True, False, False, 0), 
+            (False, True, False, 0), (False, False, True, 0), 
+            (False, False, False, 3)]
+
+
+def solve(path, variant, instance=None):
+    run_data = init_run_data(path, *variant)
+    run_algorithm(run_data, time_limit=60, threads=1, instance=instance)
+    return run_data
+
+
+@pytest.mark.parametrize("variant", VARIANTS)
+def test_shared_instance(example_path, variant):
+    instance = prepare_instance(example_path)
+    instance.cf_model.update()
+    size = instance.cf_model.NumVars, instance.cf_model.NumConstrs
+
+    shared = solve(example_path, variant, instance)
+    fresh = solve(example_path, variant)
+    assert shared.num_sol == fresh.num_sol
+    assert len(shared.schedule) == len(fresh.schedule)
+
+    # The extensions of the variant are layered onto a copy of the base model
+    instance.cf_model.update()
+    assert (instance.cf_model.NumVars, instance.cf_model.NumConstrs) == size
@@ -0,0 +1,62 @@
+import pytest
+
+from algorithm import prepare_instance, run_algorithm
+from backends import CPSATBackend, GurobiBackend, get_backend
+from batch import init_run_data
+
+
+def test_get_backend():
+    assert isinstance(get_backend("gurobi"), GurobiBackend)
+    backend = CPSATBackend(num_workers=1)
+    assert get_backend(backend) is backend
+    with pytest.raises(ValueError):
+        get_backend("unknown")
+
+
+@pytest.mark.parametrize("variant", [
+    (False, False, False, 0), (True, False, False, 0), (False, True, False, 0),
+    (False, False, True, 0), (False, False, False, 3)])
+def test_cpsat_backend(instance_path, variant):
+    instance = prepare_instance(instance_path)
+    runs = []
+    for backend in ["gurobi", "cpsat"]:
+        run_data = init_run_data(instance_path, *variant)
+        run_algorithm(run_data, time_limit=60, threads=1, instance=instance, 
+                      backend=backend)
+        runs.append(run_data)
+    gurobi, cpsat = runs
+    assert cpsat.num_sol == gurobi.num_sol
+    assert len(cpsat.schedule) == len(gurobi.schedule)
+
+
+def test_cpsat_incremental():
+    gp = pytest.importorskip("gurobipy")
+    backend = CPSATBackend(num_workers=1)
+    model = gp.Model()
+    model.Params.OutputFlag = 0
+    x = model.addVar(ub=10, vtype="I")
+    y = model.addVar(ub=10, vtype="I")
+    b = model.addVar(vtype="B")
+    model.setObjective(x + y, gp.GRB.MAXIMIZE)
+    bound = model.addConstr(x + y <= 12)
+    backend.optimize(model)
+    assert backend.obj_val(model) == 12
+    cp = model._cpsat_model.cp
+
+    # Big-M constraints with indicators: x <= 4 if b == 1, y <= 3 if b == 0
+    ctr_1 = model.addConstr(x <= 4 + 20*(1 - b))
+    ctr_0 = model.addConstr(y <= 3 + 20*b)
+    model._indicators = {ctr_1: (b, 1), ctr_0: (b, 0)}
+    backend.optimize(model)
+    assert model._cpsat_model.cp is cp
+    assert backend.obj_val(model) == 12
+    x_val, y_val = backend.values(model, [x, y])
+    assert x_val <= 4 or y_val <= 3
+
+    bound.RHS = 8
+    y.UB = 2
+    backend.optimize(model)
+    assert backend.obj_val(model) == 8
+    model.remove([bound, ctr_0])
+    backend.optimize(model)
+    assert backend.obj_val(model) == 12
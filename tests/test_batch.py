@@ -0,0 +1,65 @@
+from batch import error_record, init_run_data, run_batch, solve_task
+
+
+def test_init_run_data():
+    run_data = init_run_data("a.dzn", True, False, True, 10)
+    assert run_data.path == "a.dzn"
+    assert run_data.EMPLOYEE_OBJ and run_data.WEEKEND_OBJ
+    assert not run_data.REST_PERIODS
+    assert run_data.COUNT_SOL == 10
+    assert run_data.num_sol == 0
+
+
+def test_solve_task(example_path):
+    record = solve_task((example_path, False, False, False, 0), 
+                        time_limit=60, threads=1)
+    assert record["path"] == example_path
+    assert record["num_sol"] == 1
+    assert record["num_employees"] == 12
+    assert len(record["schedule"]) == 12 * record["num_days"]
+    assert record["wall_time"] >= record["time"]
+
+
+def test_run_batch(example_path):
+    tasks = [(example_path, False, False, False, 0), 
+             (example_path, False, False, False, 2)]
+    records = list(run_batch(tasks, num_workers=2, threads=1, time_limit=60))
+    assert sorted(record["COUNT_SOL"] for record in records) == [0, 2]
+    for record in records:
+        assert record["num_sol"] >= 1
+        assert len(record["schedule"]) == 12 * record["num_days"]
+
+
+def test_error_record():
+    record = error_record(("a.dzn", True, False, True, 10), ValueError("x"))
+    assert record["path"] == "a.dzn"
+    assert record["EMPLOYEE_OBJ"] and record["WEEKEND_OBJ"]
+    assert not record["REST_PERIODS"]
+    assert record["COUNT_SOL"] == 10
+    assert record["time"] == "error"
+    assert record["error"] == "x"
+
+
+def test_run_batch_failed_task(tmp_path, instance_path):
+    tasks = [(str(tmp_path / "missing.dzn"), False, False, False, 0), 
+             (instance_path, False, False, False, 0)]
+    records = {record["path"]: record 
+               for record in run_batch(tasks, num_workers=1, time_limit=60)}
+    assert records[tasks[0][0]]["time"] == "error"
+    assert "missing.dzn" in records[tasks[0][0]]["error"]
+    assert records[tasks[1][0]]["time"] != "error"
+    assert "error" not in records[tasks[1][0]]
+
+
+def test_solve_task_reuses_instance(instance_path):
+    records = [solve_task((instance_path, False, False, False, 0), 
+                          time_limit=60, threads=1, prune_demand=prune_demand)
+               for prune_demand in [False, False, True]]
+    # The base model is reused for equal options only, but every record 
+    # includes the stats of reading and building it
+    for record in records:
+        assert {"read", "build"} <= set(record["stats"]["phases"])
+    assert records[1]["stats"]["phases"]["build"] == \
+        records[0]["stats"]["phases"]["build"]
+    assert "prune" not in records[1]["stats"]["phases"]
+    assert "prune" in records[2]["stats"]["phases"]
@@ -0,0 +1,41 @@
+from benchmark import benchmark_task, compare, variant_name
+
+
+def test_variant_name():
+    assert variant_name((False, False, False, 0)) == "BP"
+    assert variant_name((True, True, False, 0)) == "NE/RP"
+    assert variant_name((False, False, True, 10)) == "FW/MS10"
+
+
+def test_benchmark_task(instance_path):
+    record = benchmark_task(instance_path, (False, False, False, 0), 
+                            time_limit=60, threads=1, trace_memory=True)
+    assert record["instance"] == "instance.dzn"
+    assert record["variant"] == "BP"
+    assert record["status"] == "feasible"
+    assert record["error"] is None
+    assert record["num_employees"] == 6
+    assert record["iterations"] >= 1
+    assert record["build_time"] > 0 and record["solve_time"] > 0
+    assert record["peak_memory"]
+
+
+def test_benchmark_task_error(tmp_path):
+    path = str(tmp_path / "missing.dzn")
+    record = benchmark_task(path, (False, False, False, 0), time_limit=60)
+    assert record["instance"] == "missing.dzn"
+    assert record["status"] == "error"
+    assert "missing.dzn" in record["error"]
+
+
+def test_compare():
+    base = {"instance": "a.dzn", "variant": "BP", "status": "feasible", 
+            "num_employees": 6, "iterations": 2, "build_time": 1.0, 
+            "solve_time": 1.0, "peak_memory": {"build": 100}}
+    baseline = {"a.dzn|BP": base}
+    assert compare([dict(base, solve_time=1.1)], baseline) == []
+    regressions = compare([dict(base, solve_time=2.0, iterations=4)], 
+                          baseline)
+    assert len(regressions) == 2
+    assert compare([dict(base, status="infeasible")], baseline) == [
+        "a.dzn|BP: status feasible -> infeasible"]
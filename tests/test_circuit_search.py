@@ -0,0 +1,62 @@
+import random
+
+from algorithm import prepare_instance
+from batch import solve_task
+from circuit_search import search_circuit
+from subproblem import Node, construct_arcs
+
+SHIFTS = {"D": 0, "A": 1, "N": 2}
+
+
+def make_node(day, string_rep, num_days=7):
+    work = len(string_rep.rstrip("-"))
+    days_off = len(string_rep) - work
+    off_mask = sum(1 << (day % 7 + t) for t in range(work, len(string_rep)))
+    return Node(day, (day + len(string_rep)) % num_days, 
+                SHIFTS[string_rep[0]], SHIFTS[string_rep[work - 1]], work, 
+                days_off, string_rep, (day, string_rep), off_mask)
+
+
+def schedule_nodes(schedule, num_days, seed=0):
+    """
+    Split a cyclic schedule into stints and return them in random order.
+    """
+    # Rotate the schedule such that it starts with a work block
+    start = next(i for i in range(len(schedule)) 
+                 if schedule[i - 1] == "-" and schedule[i] != "-")
+    rotated = schedule[start:] + schedule[:start]
+    stints, pos = [], 0
+    while pos < len(rotated):
+        work = len(rotated[pos:]) - len(rotated[pos:].lstrip("DAN"))
+        off = len(rotated[pos + work:]) - len(rotated[pos + work:].lstrip("-"))
+        stints.append(((start + pos) % num_days, rotated[pos:pos + work + off]))
+        pos += work + off
+    random.Random(seed).shuffle(stints)
+    return {i: make_node(day, string_rep, num_days) 
+            for i, (day, string_rep) in enumerate(stints)}
+
+
+def test_search_circuit(example_path):
+    instance = prepare_instance(example_path)
+    record = solve_task((example_path, False, False, False, 0), 
+                        time_limit=60, threads=1)
+    Nodes = schedule_nodes(record["schedule"], instance.num_days)
+    arcs = construct_arcs(Nodes, instance.forbidden, False)
+    tour = search_circuit(Nodes, arcs)
+
+    assert sorted(tour) == sorted(Nodes)
+    arc_set = set(arcs)
+    assert all((i, j) in arc_set for i, j in zip(tour, tour[1:] + tour[:1]))
+
+
+def test_search_circuit_without_circuit():
+    Nodes = {0: make_node(0, "DD-"), 1: make_node(3, "D-"), 
+             2: make_node(5, "D-")}
+    # Stint 2 has no feasible successor
+    assert search_circuit(Nodes, [(0, 1), (1, 2)]) == []
+    assert search_circuit(Nodes, [(0, 1), (1, 2), (2, 0)]) == [0, 1, 2]
+    assert search_circuit(Nodes, [(0, 1), (1, 2), (2, 0)], budget=0) is None
+
+
+def test_search_circuit_without_nodes():
+    assert search_circuit({}, []) == []
@@ -0,0 +1,83 @@
+import collections
+
+from gurobipy import quicksum
+
+from algorithm import prepare_instance
+from compact_formulation import presolve_stints
+
+
+def normalize(expr, sense, rhs):
+    coeffs = collections.Counter()
+    for i in range(expr.size()):
+        coeffs[expr.getVar(i).VarName] += expr.getCoeff(i)
+    terms = tuple(sorted((name, c) for name, c in coeffs.items() if c))
+    return terms, sense, rhs
+
+
+def model_rows(m):
+    m.update()
+    return {normalize(m.getRow(constr), constr.Sense, constr.RHS) 
+            for constr in m.getConstrs()}
+
+
+def scan_rows(instance):
+    """
+    Constraints (3) and (13) by rescanning all stints for every row.
+    """
+    m, B, H = instance.cf_model, instance.B, instance.H
+    x, v, num_days = m._x, m._v, instance.num_days
+    rows = []
+    for i, j in v:
+        expr = quicksum(x[g, b, h] for g, b, h in x 
+                        if g == i and (g + len(B[b]) + H[h]) % num_days == j)
+        expr -= v[i, j]
+        rows.append(normalize(expr, "=", 0))
+    if H[0] != 1:
+        return rows
+    for g_curr in range(num_days):
+        for last_shift in instance.forbidden:
+            lhs = [x[g, b, 0] for g, b, h in x if h == 0 
+                   and (g + len(B[b]) - 1) % num_days == g_curr 
+                   and B[b][-1][1] == last_shift]
+            rhs = [x[g, b, h] for g, b, h in x 
+                   if g == (g_curr + 2) % num_days 
+                   and B[b][0][1] not in instance.forbidden[last_shift]]
+            rows.append(normalize(quicksum(lhs) - quicksum(rhs), "<", 0))
+    return rows
+
+
+def test_inverse_index_rows(example_path):
+    instance = prepare_instance(example_path)
+    assert instance.H[0] == 1
+    rows = model_rows(instance.cf_model)
+    expected = scan_rows(instance)
+    assert len(expected) > len(instance.cf_model._v)
+    assert all(row in rows for row in expected)
+
+
+def test_presolve_stints(example_path):
+    instance = prepare_instance(example_path)
+    B, H, forbidden = instance.B, instance.H, instance.forbidden
+    num_days, demand = instance.num_days, instance.demand
+    stints, ub = presolve_stints(num_days, demand, B, H, forbidden)
+    assert set(stints) == set(instance.cf_model._x)
+
+    def follows(stint, next_stint):
+        g, b, h = stint
+        if (g + len(B[b]) + H[h]) % num_days != next_stint[0]:
+            return False
+        return H[h] > 1 or B[next_stint[1]][0][1] not in forbidden.get(
+            B[b][-1][1], ())
+
+    for stint in stints:
+        assert ub[stint[:2]] > 0
+        assert any(follows(stint, other) for other in stints)
+        assert any(follows(other, stint) for other in stints)
+
+    # Blocks covering a day without demand for one of their shifts are dropped
+    demand = [list(row) for row in demand]
+    demand[0][3] = 0
+    stints, _ = presolve_stints(num_days, demand, B, H, forbidden)
+    assert stints
+    assert not any((g + d) % num_days == 3 and s == 0 
+                   for g, b, _ in stints for d, s in B[b])
@@ -0,0 +1,38 @@
+from algorithm import prepare_instance, run_algorithm
+from batch import init_run_data
+from helper import Deadline
+
+
+def test_deadline():
+    deadline = Deadline(60)
+    assert 0 < deadline.remaining() <= 60
+    assert 0 <= deadline.elapsed() < 60
+    assert not deadline.expired()
+    expired = Deadline(0)
+    assert expired.expired()
+    assert expired.remaining() == 0
+
+
+def test_progress(example_path):
+    events = []
+    run_data = init_run_data(example_path, True, False, False, 0)
+    run_algorithm(run_data, time_limit=60, threads=1, 
+                  progress=events.append)
+    assert run_data.num_sol == 1
+    assert events
+    assert [event["elapsed"] for event in events] == sorted(
+        event["elapsed"] for event in events)
+    assert all(event["path"] == example_path for event in events)
+    # The bound on the number of employees is attained by the schedule
+    assert run_data.bound == len(run_data.schedule) // run_data.num_days
+    assert events[-1]["bound"] == run_data.bound
+
+
+def test_expired_deadline(example_path):
+    instance = prepare_instance(example_path)
+    for variant in [(False, False, False, 0), (False, False, False, 3)]:
+        run_data = init_run_data(example_path, *variant)
+        run_algorithm(run_data, threads=1, instance=instance, 
+                      deadline=Deadline(0))
+        assert run_data.time == "time limit"
+        assert run_data.num_sol == 0
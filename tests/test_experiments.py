@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from experiments import (append_result, load_results, open_results, 
+                         parse_variant, pending_tasks, task_key, variant_name)
+from run import main, problem_variants
+
+
+def test_variant_names():
+    for variant in problem_variants:
+        assert parse_variant(variant_name(variant)) == variant
+    assert variant_name((True, True, False, 0)) == "NE/RP"
+    assert parse_variant("bp/ms") == (False, False, False, 10)
+    assert parse_variant("FW/MS3") == (False, False, True, 3)
+    with pytest.raises(ValueError):
+        parse_variant("XY")
+
+
+def test_task_key():
+    assert task_key(("a/./b.dzn", 1, 0, 0, "10")) == \
+        task_key(("a/b.dzn", True, False, False, 10))
+
+
+def record(path, time):
+    return {"path": path, "EMPLOYEE_OBJ": False, "REST_PERIODS": False, 
+            "WEEKEND_OBJ": False, "COUNT_SOL": 0, "time": time}
+
+
+def test_results_file(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    with open(path, "w") as f:
+        f.write(json.dumps(record("a.dzn", 1.0)) + "\n")
+        f.write('{"path": "b.dzn", "EMPL')
+    with open_results(path) as f:
+        append_result(f, record("c.dzn", "error"))
+    results = load_results(path)
+    assert set(results) == {task_key(("a.dzn", False, False, False, 0)), 
+                            task_key(("c.dzn", False, False, False, 0))}
+
+
+def test_pending_tasks():
+    tasks = [(name, False, False, False, 0) 
+             for name in ["solved", "time", "error", "new"]]
+    results = {task_key(task): record(task[0], time) 
+               for task, time in zip(tasks, [1.0, "time limit", "error"])}
+
+    def pending(**kwargs):
+        return [task[0] for task in pending_tasks(tasks, results, **kwargs)]
+
+    assert pending() == ["new"]
+    assert pending(retry_time_limit=True) == ["time", "new"]
+    assert pending(retry_errors=True) == ["error", "new"]
+    assert pending(retry_time_limit=True, retry_errors=True) == [
+        "time", "error", "new"]
+
+
+def test_resume(tmp_path, instance_path, capsys):
+    results = str(tmp_path / "results.jsonl")
+    argv = [instance_path, "--variants", "BP", "NE", "--results", results, 
+            "--workers", "1"]
+    main(argv)
+    assert "0 of 2 tasks already solved" in capsys.readouterr().out
+    assert all(record["num_sol"] == 1 
+               for record in load_results(results).values())
+    main(argv + ["--variants", "BP", "NE", "FW"])
+    assert "2 of 3 tasks already solved" in capsys.readouterr().out
+
+
+def test_failed_task(tmp_path, capsys):
+    results = str(tmp_path / "results.jsonl")
+    argv = [str(tmp_path / "missing.dzn"), "--variants", "BP", 
+            "--results", results, "--workers", "1"]
+    main(argv)
+    assert "Task failed" in capsys.readouterr().out
+    (failed,) = load_results(results).values()
+    assert failed["time"] == "error"
+
+    main(argv)
+    assert "1 of 1 tasks already solved" in capsys.readouterr().out
+    main(argv + ["--retry-errors"])
+    assert "0 of 1 tasks already solved" in capsys.readouterr().out
@@ -0,0 +1,47 @@
+import numpy as np
+from gurobipy import GRB
+
+from helper import CycleArray, ShiftModel
+
+
+def test_cyclic_indexing():
+    array = CycleArray(7, 3)
+    array[8, 4] = "a"
+    assert array[1, 1] == "a"
+    assert array[-6, -2] == "a"
+    assert (1, 1) in array and (1, 2) not in array
+    assert array.get((0, 0)) is None
+    assert array.get((0, 0), 0) == 0
+    assert len(array) == 1
+
+
+def test_iteration():
+    array = CycleArray(3, 2)
+    array[2, 0], array[0, 1] = "b", "a"
+    # Keys are iterated in the order of the offsets
+    assert list(array) == [(0, 1), (2, 0)]
+    assert list(array.keys()) == [(0, 1), (2, 0)]
+    assert list(array.values()) == ["a", "b"]
+    assert list(array.items()) == [((0, 1), "a"), ((2, 0), "b")]
+
+
+def test_select():
+    array = CycleArray(7, 2, 3)
+    for g, b, h in np.ndindex(7, 2, 3):
+        if (g + b + h) % 2 == 0:
+            array[g, b, h] = (g, b, h)
+    expected = [(g, b, 1) for g in (6, 0, 1) for b in range(2) 
+                if (g + b + 1) % 2 == 0]
+    assert array.select(np.arange(6, 9), None, 1) == expected
+    assert array.select(-1, 1, None) == [(6, 1, 1)]
+
+
+def test_add_cyclic_vars():
+    m = ShiftModel()
+    x = m.addCyclicVars(7, 2, vtype=GRB.INTEGER, name="x")
+    m.update()
+    assert len(x) == 14
+    assert x[7, 3] is x[0, 1]
+    assert x[0, 1].VarName == "x[0,1]"
+    assert x.select(None, 1) == [x[g, 1] for g in range(7)]
+    m.dispose()
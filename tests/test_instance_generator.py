@@ -0,0 +1,31 @@
+import pytest
+
+from instance_generator import format_dzn, generate_instance, write_instances
+from reader import parse_dzn, read_example
+
+
+def test_seeded():
+    assert generate_instance(8, seed=1) == generate_instance(8, seed=1)
+    assert generate_instance(8, seed=1) != generate_instance(8, seed=2)
+
+
+@pytest.mark.parametrize("num_shifts", [1, 2, 3])
+def test_round_trip(num_shifts):
+    data = generate_instance(10, num_shifts=num_shifts, seed=3)
+    parsed = parse_dzn(format_dzn(data))
+    assert parsed["groups"] == 10
+    assert parsed["numShifts"] == num_shifts
+    assert len(parsed["demand"]) == num_shifts
+    assert all(len(row) == 7 for row in parsed["demand"])
+
+
+def test_invalid_num_shifts():
+    with pytest.raises(ValueError):
+        generate_instance(8, num_shifts=0)
+
+
+def test_write_instances(tmp_path):
+    paths = write_instances(str(tmp_path), [6, 8], num_shifts=(2,))
+    assert len(paths) == 2
+    num_days, num_employees, num_shifts, *_ = read_example(paths[1])
+    assert (num_days, num_employees, num_shifts) == (7, 8, 2)
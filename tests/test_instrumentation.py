@@ -0,0 +1,49 @@
+import json
+
+from batch import solve_task
+from instrumentation import Stats, run_record, to_json
+
+
+def test_phases():
+    stats = Stats()
+    with stats.phase("outer"):
+        with stats.phase("inner"):
+            pass
+        with stats.phase("inner"):
+            pass
+    assert stats.calls == {"outer": 1, "inner": 2}
+    assert stats.phases["outer"] >= stats.phases["inner"] >= 0
+    stats.count("cuts")
+    stats.count("cuts", 2)
+    assert stats.counters["cuts"] == 3
+    assert not stats.profiles
+
+
+def test_profile():
+    stats = Stats(profile={"profiled"})
+    with stats.phase("profiled"):
+        sorted(range(1000))
+    with stats.phase("other"):
+        pass
+    assert list(stats.profiles) == ["profiled"]
+    assert stats.peak_memory["profiled"] > 0
+    assert "sorted" in stats.as_dict()["profiles"]["profiled"]
+
+
+def test_run_record(example_path):
+    record = solve_task((example_path, False, False, False, 0), 
+                        time_limit=60, threads=1)
+    stats = json.loads(json.dumps(record))["stats"]
+    assert {"compact_solve", "subproblem"} <= set(stats["phases"])
+    assert stats["counters"]["iterations"] == 1
+
+
+def test_to_json():
+    class RunData:
+        pass
+    run_data = RunData()
+    run_data.num_sol, run_data.stats = 1, Stats()
+    with run_data.stats.phase("read"):
+        pass
+    assert run_record(run_data)["stats"]["calls"] == {"read": 1}
+    assert json.loads(to_json(run_data))["num_sol"] == 1
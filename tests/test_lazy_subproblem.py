@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import pytest
+from gurobipy import GRB, Model
+
+from algorithm import prepare_instance, run_algorithm
+from backends import CallbackModel
+from batch import init_run_data
+from helper import improves_incumbent
+
+
+class SolutionModel(SimpleNamespace):
+    def cbGet(self, what):
+        return {GRB.Callback.MIPSOL_OBJ: self.obj, 
+                GRB.Callback.MIPSOL_OBJBST: self.best}[what]
+
+
+@pytest.mark.parametrize("sense, obj, best, improves", [
+    (GRB.MINIMIZE, 10, GRB.INFINITY, True), 
+    (GRB.MINIMIZE, 9, 10, True), 
+    (GRB.MINIMIZE, 10, 10, False), 
+    (GRB.MINIMIZE, 11, 10, False), 
+    (GRB.MAXIMIZE, 3, -GRB.INFINITY, True), 
+    (GRB.MAXIMIZE, 4, 3, True), 
+    (GRB.MAXIMIZE, 3, 3 + 1e-9, False), 
+    (GRB.MAXIMIZE, 2, 3, False)])
+def test_improves_incumbent(sense, obj, best, improves):
+    model = SolutionModel(ModelSense=sense, obj=obj, best=best)
+    assert improves_incumbent(model) == improves
+
+
+@pytest.mark.parametrize("sense", [GRB.MINIMIZE, GRB.MAXIMIZE])
+def test_callback_model_without_incumbent(sense):
+    model = Model()
+    model.ModelSense = sense
+    # Backends without callbacks pass every solution to the callback
+    assert improves_incumbent(CallbackModel(model, [], 0, 0))
+    model.dispose()
+
+
+@pytest.mark.parametrize("variant", [
+    (False, False, False, 0), (False, True, False, 0), (True, True, False, 0), 
+    (False, True, True, 0), (True, False, False, 0)])
+def test_lazy_subproblem(example_path, variant):
+    instance = prepare_instance(example_path)
+    runs = []
+    for lazy_subproblem in [False, True]:
+        run_data = init_run_data(example_path, *variant)
+        run_algorithm(run_data, time_limit=60, threads=1, instance=instance, 
+                      lazy_subproblem=lazy_subproblem)
+        runs.append(run_data)
+    iterative, lazy = runs
+    assert lazy.num_sol == iterative.num_sol
+    assert lazy.cf_objective == iterative.cf_objective
+    assert bool(lazy.schedule) == bool(iterative.schedule)
+    assert len(lazy.schedule) == len(iterative.schedule)
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from algorithm import prepare_instance, run_algorithm
+from batch import init_run_data
+from instrumentation import Stats
+from model_cache import ModelCache
+
+
+def cached_instance(instance_path, cache):
+    stats = Stats()
+    instance = prepare_instance(instance_path, cache, stats=stats)
+    return instance, stats.counters.get("model_cache_hits", 0)
+
+
+def entry_keys(cache):
+    return {os.path.splitext(name)[0] for name in os.listdir(cache.directory)}
+
+
+def test_round_trip(tmp_path, instance_path):
+    cache = ModelCache(str(tmp_path / "cache"))
+    built, hits = cached_instance(instance_path, cache)
+    assert hits == 0
+    loaded, hits = cached_instance(instance_path, cache)
+    assert hits == 1
+    assert loaded.cf_model.NumVars == built.cf_model.NumVars
+    assert loaded.cf_model.NumConstrs == built.cf_model.NumConstrs
+    assert ({key: var.VarName for key, var in loaded.cf_model._x.items()} 
+            == {key: var.VarName for key, var in built.cf_model._x.items()})
+
+    run_data = init_run_data(instance_path, False, False, False, 0)
+    run_algorithm(run_data, time_limit=60, threads=1, instance=loaded)
+    assert run_data.num_sol == 1
+
+
+@pytest.mark.parametrize("corrupt", [0, 1])
+def test_corrupt_entry(tmp_path, instance_path, corrupt):
+    cache = ModelCache(str(tmp_path / "cache"))
+    cached_instance(instance_path, cache)
+    (key,) = entry_keys(cache)
+    paths = cache._paths(key)
+    with open(paths[corrupt], "wb") as f:
+        f.write(b"corrupt")
+
+    assert cache.load(key) is None
+    assert not any(os.path.exists(path) for path in paths)
+    # The entry is rebuilt and stored again
+    _, hits = cached_instance(instance_path, cache)
+    assert hits == 0
+    assert cache.load(key) is not None
+
+
+def test_missing_entry(tmp_path):
+    cache = ModelCache(str(tmp_path / "cache"))
+    assert cache.load(cache.key("missing")) is None
+
+
+def test_eviction(tmp_path, instance_path):
+    cache = ModelCache(str(tmp_path / "cache"), max_size=0)
+    prepare_instance(instance_path, cache)
+    assert not entry_keys(cache)
@@ -0,0 +1,19 @@
+import pytest
+
+from algorithm import prepare_instance, run_algorithm
+from batch import init_run_data
+
+
+@pytest.mark.parametrize("variant", [
+    (False, False, False, 5), (False, True, False, 5), (True, False, False, 5)])
+def test_solution_pool(example_path, variant):
+    instance = prepare_instance(example_path)
+    runs = []
+    for solution_pool in [False, True]:
+        run_data = init_run_data(example_path, *variant)
+        run_algorithm(run_data, time_limit=60, threads=1, instance=instance, 
+                      solution_pool=solution_pool, sp_workers=2)
+        runs.append(run_data)
+    iterative, pool = runs
+    assert pool.num_sol == iterative.num_sol == 5
+    assert len(pool.schedule) == len(iterative.schedule)
@@ -0,0 +1,47 @@
+import json
+import queue
+
+from portfolio import (configurations, conclusive, race_worker, 
+                       run_portfolio)
+
+
+def test_conclusive():
+    assert conclusive({"time": 1.5})
+    assert not conclusive({"time": "time limit"})
+
+
+def test_run_portfolio(tmp_path, instance_path):
+    log = tmp_path / "portfolio.jsonl"
+    task = (instance_path, False, False, False, 0)
+    record = run_portfolio(task, time_limit=60, threads=1, log=str(log))
+    assert record["configuration"] in configurations
+    assert record["conclusive"]
+    assert record["num_sol"] == 1
+    assert record["race_time"] >= record["time"]
+
+    (entry,) = map(json.loads, log.read_text().splitlines())
+    assert entry["winner"] == record["configuration"]
+    assert entry["configurations"] == sorted(configurations)
+
+
+def test_race_worker_failure(tmp_path):
+    results = queue.Queue()
+    task = (str(tmp_path / "missing.dzn"), False, False, False, 0)
+    race_worker("default", task, 60, 1, None, {}, results)
+    name, record = results.get_nowait()
+    assert name == "default"
+    assert record["time"] == "error"
+    assert record["path"] == task[0]
+
+
+def test_failed_configuration(instance_path):
+    task = (instance_path, False, False, False, 0)
+    configs = {"invalid": {"backend": "unknown"}, "default": {}}
+    record = run_portfolio(task, configs, time_limit=60, threads=1)
+    assert record["configuration"] == "default"
+    assert record["conclusive"]
+
+    record = run_portfolio(task, {"invalid": configs["invalid"]}, 
+                           time_limit=60, threads=1)
+    assert record["time"] == "error"
+    assert not record["conclusive"]
@@ -0,0 +1,75 @@
+import itertools
+
+from reader import (Example, generate_blocks, parse_dzn, prune_blocks, 
+                    read_example)
+
+
+def test_parse_dzn():
+    text = """
+    % comment = 1;
+    n = 3; neg = -2;
+    a = [1, 2,3];
+    m = [| 1, 2,
+         | 3, 4 |];
+    s = [{}, {1}, {1,2}];
+    """
+    assert parse_dzn(text) == {"n": 3, "neg": -2, "a": [1, 2, 3], 
+                               "m": [[1, 2], [3, 4]], "s": [[], [1], [1, 2]]}
+
+
+def test_read_string(example_path):
+    data = Example()
+    data.read_data(example_path)
+    assert data.num_employees == 12
+    assert data.num_shifts == 3
+    assert data.temp_matrix[1] == [4, 4, 4, 3, 3, 3, 2]
+    assert data.min_length_blocks == [2, 2, 2]
+    assert (data.min_days_off, data.max_days_off) == (1, 4)
+    assert ["N", "D"] in data.disallowed_shift_seq
+    assert ["N", "-", "A"] in data.disallowed_shift_seq
+
+    with open(example_path) as f:
+        text = f.read()
+    other = Example()
+    other.read_string(text)
+    assert vars(other) == vars(data)
+
+
+def enumerate_blocks(S, allowed, min_shift, max_shift, min_on, max_on, 
+                     max_runs=3):
+    # All shift sequences, filtered by the rules for work blocks
+    blocks = set()
+    for length in range(min_on, max_on + 1):
+        for block in itertools.product(S, repeat=length):
+            runs = [(s, len(list(run))) 
+                    for s, run in itertools.groupby(block)]
+            if (len(runs) <= max_runs 
+                    and all(min_shift[s] <= n <= max_shift[s] 
+                            for s, n in runs) 
+                    and all((s, s_) in allowed 
+                            for (s, _), (s_, _) in zip(runs, runs[1:]))):
+                blocks.add(block)
+    return blocks
+
+
+def test_generate_blocks():
+    S = range(3)
+    allowed = [(0, 1), (0, 2), (1, 2), (2, 0)]
+    args = (S, allowed, [2, 2, 2], [7, 7, 5], 3, 7)
+    blocks = list(generate_blocks(*args))
+    assert len(blocks) == len(set(blocks))
+    assert set(blocks) == enumerate_blocks(*args)
+
+
+def test_prune_blocks():
+    blocks = [(0, 0), (1, 1), (0, 1)]
+    demand = [[1, 1, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0]]
+    assert prune_blocks(blocks, demand, 7) == ([(0, 0)], 2)
+
+
+def test_read_example(example_path):
+    num_days, num_employees, num_shifts, demand, blocks, forbidden, \
+        min_off, max_off = read_example(example_path)
+    assert (num_days, num_employees, num_shifts) == (7, 12, 3)
+    assert forbidden == [(2, 2), (1, 0), (2, 1), (2, 0)]
+    assert all(3 <= len(block) <= 7 for block in blocks)
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+from gurobipy import quicksum
+
+from algorithm import prepare_instance
+from compact_formulation import copy_compact_formulation
+from extensions.rest_periods import cf_rest_period_ctr
+from stint_table import StintTable, violates_rest_period
+
+
+def violates(start, rep, next_rep):
+    # Days off in the first week after the start day, if both stints cover it
+    combined = rep + next_rep
+    offset = 7 - start % 7
+    return (len(combined) > offset + 7 
+            and combined[offset:offset + 7].count("-") < 2)
+
+
+@pytest.mark.parametrize("num_days", [7, 14])
+def test_violates_rest_period(num_days):
+    blocks = ["DD", "DDD", "DDDDD", "DDDDDDD"]
+    B = {b: list(enumerate(0 for _ in block)) for b, block in enumerate(blocks)}
+    H = {h: days_off for h, days_off in enumerate(range(1, 4))}
+    stints = StintTable(num_days, B, H)
+
+    pairs, expected = [], []
+    for g, b, h in np.ndindex(*stints.shape):
+        g_ = int(stints.end[g, b, h])
+        for b_, h_ in np.ndindex(len(B), len(H)):
+            first, second = (g, b, h), (g_, b_, h_)
+            pairs.append((first, second))
+            expected.append(violates(g, stints.string_rep(b, h), 
+                                     stints.string_rep(b_, h_)))
+            assert bool(violates_rest_period(
+                g, int(stints.length[first]), int(stints.off_mask[first]), 
+                int(stints.length[second]), int(stints.off_mask[second]))
+                ) == expected[-1]
+    assert any(expected) and not all(expected)
+
+    # Vectorized over all pairs
+    first, second = (tuple(np.array(keys).T) for keys in zip(*pairs))
+    violated = violates_rest_period(first[0], stints.length[first], 
+                                    stints.off_mask[first], 
+                                    stints.length[second], 
+                                    stints.off_mask[second])
+    assert violated.tolist() == expected
+
+
+def string_rest_period_ctr(cf_model, num_days, B, H, forbidden):
+    # Rest period constraints computed on the day sequences of the stints
+    x = cf_model._x
+    infeas_stints = [(0, 7), (0, 6), (1, 6), (1, 7), (6, 7)]
+    for g, b, h in x:
+        if (((g % 7), len(B[b])) in infeas_stints
+                or ((g % 7) == 4 and len(B[b]) == 6 and h == 0)
+                or ((g + len(B[b]) - 1) % 7 in [2, 3, 4, 5] and H[h] == 1)):
+            x[g, b, h].UB = 0
+
+    start_one, end_one = {}, {}
+    for week in range(num_days // 7):
+        for day in range(1, 4):
+            start_one[day + week*7] = [
+                (g, b, h) for g, b, h in x 
+                if g == day + week*7 and g + len(B[b]) - 1 <= 5 + week*7]
+        for day in range(3):
+            end_one[day + week*7] = []
+        for g, b, h in x:
+            first_day_off = (g + len(B[b])) % num_days
+            days_off = [first_day_off + h_ for h_ in range(H[h])]
+            if (sum(1 for i in days_off if i - week*7 in range(3)) == 1 
+                    and days_off[-1] <= 2 + week*7):
+                end_one[days_off[-1]].append((g, b, h))
+
+    cf_model.addConstrs(
+        quicksum(x[key] for key in end_one[end]) 
+        <= quicksum(x[key] for key in start_one[end + 1]) for end in end_one)
+    for last_s in forbidden:
+        cf_model.addConstrs(
+            quicksum(x[g, b, h] for g, b, h in end_one[end] 
+                     if B[b][-1][1] == last_s and H[h] == 1) 
+            <= quicksum(x[g, b, h] for g, b, h in start_one[end + 1] 
+                        if B[b][0][1] not in forbidden[last_s]) 
+            for end in end_one if H[0] == 1)
+
+
+def constraints(cf_model, base):
+    cf_model.update()
+    names = {var.index: key for key, var in cf_model._x.items()}
+    rows = []
+    for constr in cf_model.getConstrs()[base:]:
+        row = cf_model.getRow(constr)
+        rows.append((sorted((names[row.getVar(i).index], row.getCoeff(i)) 
+                            for i in range(row.size())), 
+                     constr.Sense, constr.RHS))
+    fixed = sorted(key for key, var in cf_model._x.items() if var.UB == 0)
+    return fixed, sorted(rows)
+
+
+def test_rest_period_ctr(example_path):
+    instance = prepare_instance(example_path)
+    base = instance.cf_model.NumConstrs
+    masks = copy_compact_formulation(instance.cf_model)
+    strings = copy_compact_formulation(instance.cf_model)
+    cf_rest_period_ctr(masks, instance.stints, instance.forbidden)
+    string_rest_period_ctr(strings, instance.num_days, instance.B, 
+                           instance.H, instance.forbidden)
+    fixed, rows = constraints(masks, base)
+    assert fixed and rows
+    assert (fixed, rows) == constraints(strings, base)
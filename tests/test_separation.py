@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import gurobipy as gp
+
+from backends import CallbackModel
+from helper import get_segments, subcyclecuts
+from instrumentation import Stats
+from separation import UnionFind, connected_components
+
+
+def normalize(components):
+    return sorted((sorted(nodes), sorted(edges)) for nodes, edges in components)
+
+
+def test_union_find():
+    uf = UnionFind()
+    uf.union(0, 1)
+    uf.union(2, 3)
+    assert uf.find(0) == uf.find(1)
+    assert uf.find(0) != uf.find(2)
+    uf.union(1, 3)
+    assert len({uf.find(i) for i in range(4)}) == 1
+    assert uf.find(5) == 5
+
+
+def test_connected_components():
+    edges = [(0, 1), (1, 2), (3, 4), (5, 5)]
+    assert normalize(connected_components(edges)) == [
+        ([0, 1, 2], [(0, 1), (1, 2)]), ([3, 4], [(3, 4)]), ([5], [(5, 5)])]
+
+
+def test_connected_components_isolated_nodes():
+    components = connected_components([(0, 1)], nodes=range(3))
+    assert normalize(components) == [([0, 1], [(0, 1)]), ([2], [])]
+
+
+def test_connected_components_directed_edges():
+    # Edges are treated as undirected
+    edges = [(0, 1), (2, 1), (3, 2)]
+    assert normalize(connected_components(edges)) == [
+        ([0, 1, 2, 3], [(0, 1), (2, 1), (3, 2)])]
+
+
+def test_get_segments():
+    edges = [(0, 1), (4, 5), (1, 2), (5, 6)]
+    segments = get_segments(edges)
+    assert sorted(map(sorted, segments)) == [
+        [(0, 1), (1, 2)], [(4, 5), (5, 6)]]
+    assert edges == [(0, 1), (4, 5), (1, 2), (5, 6)]
+
+
+def test_segment_cuts():
+    model = gp.Model()
+    model.Params.OutputFlag = 0
+    model._v = model.addVars(4, 4, ub=2, vtype=gp.GRB.INTEGER)
+    model._run_data = SimpleNamespace(EMPLOYEE_OBJ=False, stats=Stats())
+    model._lazy_subproblem = False
+    model.update()
+
+    def solution(edges):
+        return [1 if key in edges else 0 for key in model._v.keys()]
+
+    # Two segments 0-1 and 2-3 yield one cut each
+    cb_model = CallbackModel(model, solution({(0, 1), (1, 0), (2, 3), (3, 2)}),
+                             0, 0)
+    subcyclecuts(cb_model, gp.GRB.Callback.MIPSOL)
+    assert len(cb_model._cb_lazy) == 2
+    for constr in cb_model._cb_lazy:
+        model.addConstr(constr)
+
+    def feasible(edges):
+        for key, val in zip(model._v.keys(), solution(edges)):
+            model._v[key].LB = model._v[key].UB = val
+        model.optimize()
+        return model.Status == gp.GRB.OPTIMAL
+
+    assert not feasible({(0, 1), (1, 0), (2, 3), (3, 2)})
+    assert not feasible({(0, 1), (1, 0)})
+    # A connected solution that uses all edges of both segments
+    assert feasible({(0, 1), (1, 0), (1, 2), (2, 1), (2, 3), (3, 2)})
@@ -0,0 +1,154 @@
+import io
+import json
+
+import pytest
+from gurobipy import GurobiError
+
+from instance_generator import format_dzn, generate_instance
+from instrumentation import Stats
+from service import (InvalidRequest, ServiceBusy, SolveService, error_status, 
+                     serve_stdio, validate_request)
+
+
+@pytest.fixture
+def instance_dir(tmp_path, make_instance):
+    (tmp_path / "instances").mkdir()
+    make_instance(name="instances/instance.dzn")
+    (tmp_path / "secret.txt").write_text("secret")
+    return tmp_path / "instances"
+
+
+def make_service(instance_dir=None):
+    return SolveService(num_envs=1, max_queue=0, instance_dir=instance_dir)
+
+
+def test_solve():
+    service = SolveService(num_envs=1, max_queue=0)
+    request = {"instance": format_dzn(generate_instance(6, num_shifts=2)), 
+               "id": 1}
+    try:
+        first = service.submit(request).result()
+        assert first["id"] == 1
+        assert first["num_sol"] == 1
+        assert len(first["schedule"]) == 6 * first["num_days"]
+        assert "instance_reused" not in first["stats"]["counters"]
+
+        second = service.submit(dict(request, id=2, REST_PERIODS=True, 
+                                     WEEKEND_OBJ=True)).result()
+        assert second["id"] == 2
+        assert second["REST_PERIODS"] and second["WEEKEND_OBJ"]
+        assert second["stats"]["counters"]["instance_reused"] == 1
+    finally:
+        service.close()
+
+
+def test_serve_stdio():
+    service = SolveService(num_envs=1)
+    text = format_dzn(generate_instance(6, num_shifts=2))
+    lines = [json.dumps({"instance": text, "id": "a"}), "", "not json", 
+             json.dumps({"instance": "groups = ;", "id": "b"})]
+    stdout = io.StringIO()
+    try:
+        serve_stdio(service, io.StringIO("\n".join(lines) + "\n"), stdout)
+    finally:
+        service.close()
+    records = {record["id"]: record 
+               for record in map(json.loads, stdout.getvalue().splitlines())}
+    assert set(records) == {"a", "b", None}
+    assert records["a"]["num_sol"] == 1
+    assert "error" in records["b"] and "error" in records[None]
+
+
+def test_read_instance_text():
+    service = make_service()
+    try:
+        assert service.read_instance({"instance": "groups = 1;"}) == \
+            "groups = 1;"
+    finally:
+        service.close()
+
+
+def test_read_instance_path_disabled(instance_dir):
+    service = make_service()
+    try:
+        with pytest.raises(ValueError, match="disabled"):
+            service.read_instance({"path": str(instance_dir / "instance.dzn")})
+    finally:
+        service.close()
+
+
+def test_read_instance_path(instance_dir):
+    service = make_service(str(instance_dir))
+    try:
+        text = service.read_instance({"path": "instance.dzn"})
+        assert text == (instance_dir / "instance.dzn").read_text()
+        for path in ["../secret.txt", str(instance_dir.parent / "secret.txt")]:
+            with pytest.raises(ValueError, match="outside"):
+                service.read_instance({"path": path})
+    finally:
+        service.close()
+
+
+def test_read_instance_symlink(instance_dir):
+    (instance_dir / "link.dzn").symlink_to(instance_dir.parent / "secret.txt")
+    service = make_service(str(instance_dir))
+    try:
+        with pytest.raises(ValueError, match="outside"):
+            service.read_instance({"path": "link.dzn"})
+    finally:
+        service.close()
+
+
+def test_solve_by_path(instance_dir):
+    service = make_service(str(instance_dir))
+    try:
+        record = service.submit({"path": "instance.dzn", "id": 1}).result()
+        assert record["id"] == 1
+        with pytest.raises(ValueError):
+            service.submit({"path": "/etc/passwd"}).result()
+    finally:
+        service.close()
+
+
+def test_eviction_of_used_instance():
+    service = SolveService(num_envs=1, max_instances=1)
+    first, second = [{"instance": format_dzn(generate_instance(6, seed=seed))}
+                     for seed in range(2)]
+    try:
+        with service.instance(first, Stats()) as instance:
+            with service.instance(second, Stats()):
+                pass
+            # The evicted instance remains usable until it is released
+            assert len(service._instances) == 1
+            assert instance.cf_model.NumVars > 0
+        with pytest.raises(GurobiError):
+            instance.cf_model.NumVars
+    finally:
+        service.close()
+
+
+def test_unknown_instance(instance_dir):
+    service = make_service(str(instance_dir))
+    try:
+        with pytest.raises(InvalidRequest, match="Unknown instance"):
+            service.submit({"path": "missing.dzn"}).result()
+        with pytest.raises(InvalidRequest, match="Invalid instance"):
+            service.submit({"instance": "groups = 6;"}).result()
+    finally:
+        service.close()
+
+
+@pytest.mark.parametrize("request_", [
+    [], {}, {"path": 1}, {"instance": "", "EMPLOYEE_OBJ": 1}, 
+    {"instance": "", "COUNT_SOL": -1}, {"instance": "", "COUNT_SOL": True}, 
+    {"instance": "", "time_limit": "60"}])
+def test_validate_request(request_):
+    with pytest.raises(InvalidRequest):
+        validate_request(request_)
+
+
+def test_error_status():
+    assert error_status(ServiceBusy()) == 503
+    assert error_status(InvalidRequest()) == 400
+    assert error_status(GurobiError(10001, "Out of memory")) == 500
+    assert error_status(KeyError("x")) == 500
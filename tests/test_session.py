@@ -0,0 +1,75 @@
+import pytest
+
+from algorithm import run_algorithm
+from batch import init_run_data
+from instance_generator import format_dzn
+from reader import parse_dzn
+from session import Session
+
+
+@pytest.fixture
+def instance(make_instance):
+    return make_instance(8, num_shifts=2, seed=1)
+
+
+def solve_fresh(tmp_path, instance, variant, demand, num_employees):
+    data = parse_dzn(open(instance).read())
+    data["demand"], data["groups"] = demand, num_employees
+    path = tmp_path / "scenario.dzn"
+    path.write_text(format_dzn(data))
+    run_data = init_run_data(str(path), *variant)
+    run_algorithm(run_data, time_limit=60, threads=1)
+    return run_data
+
+
+@pytest.mark.parametrize("variant", [
+    (False, False, False, 0), (True, True, False, 0), (False, True, True, 0), 
+    (False, False, False, 5)])
+def test_scenarios(tmp_path, instance, variant):
+    session = Session(init_run_data(instance, *variant), threads=1)
+    demand = [list(row) for row in session.instance.demand]
+    num_employees = session.instance.num_employees
+    # Move one shift to another day, add one and change the staff size
+    s = max(range(len(demand)), key=lambda s: demand[s][0])
+    scenarios = [({}, None), 
+                 ({(s, 0): demand[s][0] - 1, (s, 1): demand[s][1] + 1}, None),
+                 ({(s, 2): demand[s][2] + 1}, num_employees + 1)]
+    for changes, staff in scenarios:
+        for (s_, g), value in changes.items():
+            demand[s_][g] = value
+        if staff is not None:
+            num_employees = staff
+        session.update(demand=changes, num_employees=staff)
+        run_data = session.solve(time_limit=60)
+        fresh = solve_fresh(tmp_path, instance, variant, demand, 
+                            num_employees)
+        assert bool(run_data.schedule) == bool(fresh.schedule)
+        assert run_data.num_sol == fresh.num_sol
+        assert run_data.cf_objective == fresh.cf_objective
+
+
+def test_nogoods_dropped(instance):
+    session = Session(init_run_data(instance, False, False, False, 0), 
+                      threads=1)
+    cf_model = session.cf_model
+    cf_model.update()
+    num_constrs = cf_model.NumConstrs
+    support = [(key, 1) for key in list(cf_model._x.keys())[:3]]
+    session._add_nogoods([support])
+    cf_model._lazy_nogoods.append(support)
+    cf_model.update()
+    assert cf_model.NumConstrs == num_constrs + 1
+
+    # No-goods are kept while the scenario is unchanged
+    session.update()
+    session.update(demand={})
+    assert len(cf_model._nogoods) == 1 and cf_model._lazy_nogoods
+
+    session.update(num_employees=session.instance.num_employees)
+    cf_model.update()
+    assert cf_model._nogoods == [] and cf_model._lazy_nogoods == []
+    assert cf_model.NumConstrs == num_constrs
+
+    session._add_nogoods([support])
+    session.update(demand={(0, 0): session.instance.demand[0][0]})
+    assert session.cf_model._nogoods == []
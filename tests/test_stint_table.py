@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from stint_table import StintTable, week_days
+
+SHIFTS = "DAN"
+
+
+def planning_cycles(start_day, last_day, days_off, num_days, block_len):
+    # Walk over the days of the stint, counting the passed starts of a week
+    day, weeks = start_day, int(start_day == 0)
+
+    def advance(day, weeks):
+        if day == num_days - 1:
+            return 0, weeks + 1
+        return day + 1, weeks
+
+    day, weeks = advance(day, weeks)
+    counter = 1
+    while day != last_day or counter < block_len - 1:
+        day, weeks = advance(day, weeks)
+        counter += 1
+    day, weeks = advance(day, weeks)
+    day_before_next_block = (last_day + days_off) % num_days
+    while day != day_before_next_block:
+        day, weeks = advance(day, weeks)
+    return weeks
+
+
+@pytest.fixture(scope="module", params=[7, 14, 21])
+def table(request):
+    blocks = ["DDD", "DDAA", "NNNNN", "DDDAANN", "AANN"]
+    B = {b: list(enumerate(SHIFTS.index(s) for s in block)) 
+         for b, block in enumerate(blocks)}
+    H = {h: days_off for h, days_off in enumerate(range(1, 5))}
+    return StintTable(request.param, B, H), B, H
+
+
+def test_lengths(table):
+    stints, B, H = table
+    assert stints.min_days_off == 1
+    for g, b, h in np.ndindex(*stints.shape):
+        length = len(B[b]) + H[h]
+        assert stints.length[g, b, h] == length
+        assert stints.end[g, b, h] == (g + length) % stints.num_days
+        assert stints.last_day[g, b, h] == \
+            (g + len(B[b]) - 1) % stints.num_days
+        assert stints.first_shift[g, b, h] == B[b][0][1]
+        assert stints.last_shift[g, b, h] == B[b][-1][1]
+
+
+def test_num_cycles(table):
+    stints, B, H = table
+    for g, b, h in np.ndindex(*stints.shape):
+        assert stints.num_cycles[g, b, h] == planning_cycles(
+            g, stints.last_day[g, b, h], H[h], stints.num_days, len(B[b]))
+
+
+def test_free_weekends(table):
+    stints, _, _ = table
+    for g, b, h in np.ndindex(*stints.shape):
+        rep = stints.string_rep(b, h)
+        # Friday without a night shift, followed by a free weekend
+        expected = sum(1 for t in range(len(rep) - 2) 
+                       if (g + t) % 7 == 4 and rep[t] != "N" 
+                       and rep[t+1:t+3] == "--")
+        assert stints.free_weekends[g, b, h] == expected
+
+
+def test_masks(table):
+    stints, _, _ = table
+    for g, b, h in np.ndindex(*stints.shape):
+        rep = stints.string_rep(b, h)
+        offset = g % 7
+        work = sum(1 << (offset + t) for t, s in enumerate(rep) if s != "-")
+        off = sum(1 << (offset + t) for t, s in enumerate(rep) if s == "-")
+        assert stints.work_mask[g, b, h] == work
+        assert stints.off_mask[g, b, h] == off
+        assert sum(week_days(off, w) for w in range(3)) == rep.count("-")
+
+
+def test_lookup(table):
+    stints, _, _ = table
+    keys = [(0, 1, 2), (stints.num_days - 1, 3, 0)]
+    values = stints.lookup("length", keys)
+    assert values == {keys[0]: 7, keys[1]: 8}
+    assert all(type(value) is int for value in values.values())
+    assert stints.lookup("length", []) == {}
+    assert stints.string_rep(1, 2) == "DDAA---"
@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from algorithm import prepare_instance
+from subproblem import construct_arcs, construct_nodes
+
+
+def scan_arcs(Nodes, forbidden, REST_PERIODS):
+    """
+    Feasible arcs by checking every pair of stints.
+    """
+    arcs = []
+    for i1, n1 in Nodes.items():
+        for i2, n2 in Nodes.items():
+            if i1 == i2 or n1.end != n2.start:
+                continue
+            if n1.do == 1 and n2.fwork in forbidden[n1.lwork]:
+                continue
+            if REST_PERIODS:
+                combined = n1.string_rep + n2.string_rep
+                idx_offset = 7 - (n1.start % 7)
+                if len(combined) > idx_offset + 7:
+                    if sum(1 for i in combined[idx_offset:idx_offset+7] 
+                           if i == "-") < 2:
+                        continue
+            arcs.append((i1, i2))
+    return arcs
+
+
+@pytest.mark.parametrize("REST_PERIODS", [False, True])
+def test_construct_arcs(example_path, REST_PERIODS):
+    instance = prepare_instance(example_path)
+    stints = random.Random(0).sample(list(instance.cf_model._x), 300)
+    Nodes = construct_nodes(stints, instance.B, instance.H, 
+                            instance.num_days)
+    arcs = construct_arcs(Nodes, instance.forbidden, REST_PERIODS)
+    expected = scan_arcs(Nodes, instance.forbidden, REST_PERIODS)
+    assert expected
+    assert sorted(arcs) == sorted(expected)
@@ -0,0 +1,54 @@
+from subproblem_cache import SubproblemCache, rotate
+
+
+def shifted(x, days, num_days):
+    return [((g + days) % num_days, b, h) for g, b, h in x]
+
+
+def test_rotate():
+    assert rotate("abcdefg", 0) == "abcdefg"
+    assert rotate("abcdefg", 2) == "fgabcde"
+    assert rotate(rotate("abcdefg", 3), -3) == "abcdefg"
+    assert rotate("abcdefg", 9) == rotate("abcdefg", 2)
+
+
+def test_rotation_invariance():
+    cache = SubproblemCache(14)
+    x = [(0, 1, 2), (3, 0, 1), (3, 0, 1)]
+    key, _ = cache.canonical(x, False)
+    for days in range(14):
+        assert cache.canonical(shifted(x, days, 14), False)[0] == key
+    # With rest periods, only rotations by whole weeks are equivalent
+    key, _ = cache.canonical(x, True)
+    assert cache.canonical(shifted(x, 7, 14), True)[0] == key
+    assert cache.canonical(shifted(x, 1, 14), True)[0] != key
+    # Multisets differ from sets, and the variants do not share keys
+    assert cache.canonical(x[:2], False)[0] != cache.canonical(x, False)[0]
+    assert cache.canonical(x, False)[0] != cache.canonical(x, True)[0]
+
+
+def test_get_put():
+    cache = SubproblemCache(7)
+    x = [(1, 0, 0), (4, 1, 2)]
+    assert cache.get(x, False) is None
+    cache.put(x, False, (1, "abcdefg"))
+    assert cache.get(x, False) == (1, "abcdefg")
+    assert cache.get(x, True) is None
+    # The schedule of a rotated multiset is rotated accordingly
+    assert cache.get(shifted(x, 2, 7), False) == (1, rotate("abcdefg", 2))
+    cache.put(x, True, (2, None))
+    assert cache.get(x, True) == (2, None)
+    assert (cache.hits, cache.misses) == (3, 2)
+
+
+def test_eviction():
+    cache = SubproblemCache(7, maxsize=2)
+    xs = [[(0, b, 0)] for b in range(3)]
+    cache.put(xs[0], False, (2, None))
+    cache.put(xs[1], False, (2, None))
+    # The least recently used entry is evicted
+    cache.get(xs[0], False)
+    cache.put(xs[2], False, (2, None))
+    assert cache.get(xs[1], False) is None
+    assert cache.get(xs[0], False) == (2, None)
+    assert cache.get(xs[2], False) == (2, None)
@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import pytest
+
+from algorithm import build_variant, prepare_instance, run_algorithm
+from batch import init_run_data
+from instance_generator import format_dzn, generate_instance
+from helper import CycleArray
+from instrumentation import Stats
+from symmetry import rotations, subproblem_shifts, symmetry_shifts
+
+
+def variant(EMPLOYEE_OBJ=False, REST_PERIODS=False, WEEKEND_OBJ=False,
+            COUNT_SOL=0):
+    return SimpleNamespace(EMPLOYEE_OBJ=EMPLOYEE_OBJ,
+                           REST_PERIODS=REST_PERIODS, WEEKEND_OBJ=WEEKEND_OBJ,
+                           COUNT_SOL=COUNT_SOL, stats=Stats())
+
+
+@pytest.fixture(scope="module")
+def symmetric_instance(tmp_path_factory):
+    # Constant demand per shift type is invariant under all rotations
+    data = generate_instance(6, num_shifts=2, seed=0)
+    data["demand"] = [[sum(row) // 7] * 7 for row in data["demand"]]
+    path = tmp_path_factory.mktemp("instances") / "symmetric.dzn"
+    path.write_text(format_dzn(data))
+    return prepare_instance(str(path))
+
+
+def test_subproblem_shifts():
+    assert list(subproblem_shifts(7, False)) == list(range(7))
+    assert list(subproblem_shifts(7, True)) == [0]
+
+
+def test_symmetry_shifts():
+    constant = [[2] * 7, [3] * 7]
+    assert symmetry_shifts(constant, 7, variant()) == list(range(7))
+    assert symmetry_shifts(constant, 7, variant(REST_PERIODS=True)) == [0]
+    assert symmetry_shifts(constant, 7, variant(WEEKEND_OBJ=True)) == [0]
+    assert symmetry_shifts([[1, 2, 1, 2, 1, 2, 1]], 7, variant()) == [0]
+
+
+def test_rotations():
+    x = CycleArray(7, 2, 1)
+    for key in [(0, 0, 0), (1, 0, 0), (2, 0, 0), (3, 1, 0)]:
+        x[key] = key
+    vals = [1, 0, 0, 2]
+    # Keys in the order of x.values()
+    assert list(x.keys()) == [(0, 0, 0), (1, 0, 0), (2, 0, 0), (3, 1, 0)]
+    # The rotation by one day uses (4,1,0), which has no variable
+    assert rotations(x, vals, [0, 1]) == [vals]
+    assert rotations(x, [1, 0, 0, 0], [0, 1, 2, 3]) == [
+        [1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0]]
+    # Duplicates are omitted
+    assert rotations(x, [1, 0, 0, 0], [0, 0]) == [[1, 0, 0, 0]]
+
+
+@pytest.mark.parametrize("EMPLOYEE_OBJ, WEEKEND_OBJ, num_constrs", [
+    (False, False, 6), (True, False, 6), (False, True, 0)])
+def test_symmetry_breaking(symmetric_instance, EMPLOYEE_OBJ, WEEKEND_OBJ,
+                           num_constrs):
+    # Free weekends depend on the weekdays, such that FW is not symmetric
+    run_data = variant(EMPLOYEE_OBJ=EMPLOYEE_OBJ, WEEKEND_OBJ=WEEKEND_OBJ)
+    cf_model = build_variant(run_data, symmetric_instance, symmetry=True)
+    assert len(cf_model._symmetry_breaking) == num_constrs
+    assert list(cf_model._nogood_shifts) == list(range(7))
+
+    cf_model = build_variant(run_data, symmetric_instance)
+    assert cf_model._symmetry_breaking is None
+    assert cf_model._nogood_shifts == [0]
+
+
+def test_no_symmetry_breaking_for_multiple_solutions(symmetric_instance):
+    cf_model = build_variant(variant(COUNT_SOL=10), symmetric_instance,
+                             symmetry=True)
+    assert cf_model._symmetry_breaking is None
+
+
+@pytest.mark.parametrize("flags", [
+    (False, False, False, 0), (True, False, False, 0), (False, False, True, 0), 
+    (False, False, False, 1), (False, False, False, 5)])
+def test_symmetry(symmetric_instance, flags):
+    runs = []
+    for symmetry in [False, True]:
+        run_data = init_run_data(symmetric_instance.path, *flags)
+        run_algorithm(run_data, time_limit=60, threads=1, 
+                      instance=symmetric_instance, symmetry=symmetry)
+        runs.append(run_data)
+    plain, symmetric = runs
+    assert symmetric.num_sol == plain.num_sol > 0
+    assert len(symmetric.schedule) == len(plain.schedule)